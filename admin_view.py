@@ -1,5 +1,7 @@
 import hashlib
+import json
 import sqlite3
+from src.database.maintenance import run_maintenance
 
 
 def list_users(connect):
@@ -141,11 +143,32 @@ def add_to_white_list(connect):
         print("Email já está na white list!")
 
 
+def database_maintenance(connect):
+    """Executa a manutenção do banco (estatísticas e espaço livre)"""
+    print("MANUTENÇÃO DO BANCO DE DADOS")
+    full = input(
+        "Converter para auto_vacuum incremental com VACUUM completo? (s/n): ").strip().lower()
+    try:
+        status, results = run_maintenance(
+            force=True, full_vacuum=full in ['s', 'sim'])
+    except Exception as e:
+        print(f"Erro na manutenção: {e}")
+        return
+
+    for result in results:
+        print(f"Banco: {result['banco']}")
+        print(f"Tarefas (ms): {json.dumps(result['tasks'])}")
+        print(f"Espaço recuperado: {result['bytes_reclaimed']} bytes")
+        if result['needs_full_vacuum']:
+            print("auto_vacuum desativado: escolha o VACUUM completo para recuperar o espaço livre")
+        print("-" * 30)
+
+
 def admin_panel(connect):
     """Painel principal de administração"""
     option = 0
 
-    while option != 6:
+    while option != 7:
         try:
             print("\n" + "="*50)
             print("PAINEL DE ADMINISTRAÇÃO")
@@ -155,7 +178,8 @@ def admin_panel(connect):
             print("3. Cadastrar novo usuário")
             print("4. Remover usuário")
             print("5. Adicionar usuário à white list")
-            print("6. Voltar ao menu principal")
+            print("6. Manutenção do banco de dados")
+            print("7. Voltar ao menu principal")
             print("-"*50)
 
             option = int(input("Digite a opção desejada: "))
@@ -181,11 +205,15 @@ def admin_panel(connect):
                 input('Digite enter para voltar ao menu')
 
             elif option == 6:
+                database_maintenance(connect)
+                input('Digite enter para voltar ao menu')
+
+            elif option == 7:
                 print("Retornando ao menu principal...")
                 break
 
             else:
-                print("Opção inválida! Digite 1, 2, 3, 4, 5 ou 6.")
+                print("Opção inválida! Digite 1, 2, 3, 4, 5, 6 ou 7.")
 
         except ValueError:
             print("Erro: Digite apenas números para as opções!")
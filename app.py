@@ -1,23 +1,39 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session
 from flask_cors import CORS
 import os
-from src.database.connection import init_db
+from src.database.connection import init_db, init_app, get_pool_stats
+from src.database.instrumentation import get_query_stats, query_stats
+from src.database.write_queue import get_write_queue
+from src.database.maintenance import get_scheduler, recent_runs, request_run
+from src.database.replica import get_catalog_replica
+from functools import wraps
 from src.controllers.auth_controller import AuthController
-from src.controllers.product_controller import ProductController
+from src.controllers.export_controller import ExportController
+from src.controllers.product_controller import ProductController, catalog_swr
+from src.controllers.sale_controller import SaleController
+from src.models.product import catalog_cache, shared_catalog_cache
+from src.utils.single_flight import get_single_flight_stats
+from src.utils.swr import StaleWhileRevalidate
 from datetime import datetime
+import config
 
-# Inicializar banco de dados se não existir
+# Inicializar banco de dados e aplicar migrações pendentes
 if not os.path.exists('database.db'):
     print("📊 Inicializando banco de dados...")
-    init_db()
-    print("📊 Banco de dados criado: database.db")
 else:
     print("📊 Banco de dados já existe: database.db")
+init_db()
 
 app = Flask(__name__)
 app.secret_key = os.environ.get(
     'SECRET_KEY', '33d4a5d98ad218beebc1a5acfd22cccd')
 
+# Devolver a conexão do pool ao fim de cada requisição
+init_app(app)
+
+# Réplica do catálogo em memória (opcional): carregada já na inicialização
+get_catalog_replica()
+
 # Configuração da sessão para funcionar no Render
 # Mudando para False para permitir HTTP
 app.config['SESSION_COOKIE_SECURE'] = False
@@ -42,6 +58,29 @@ CORS(app, origins=[
     'https://*.render.com'
 ], supports_credentials=True, allow_headers=['Content-Type'], methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
 
+
+@app.before_request
+def start_maintenance_scheduler():
+    """Manutenção periódica do banco (ANALYZE / optimize / incremental_vacuum)
+
+    Iniciada na primeira requisição de cada worker; entre os workers, só um
+    executa a manutenção por vez (ver MaintenanceScheduler).
+    """
+    get_scheduler()
+
+
+def admin_required(view):
+    """Restringe a rota a administradores logados"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not session.get('is_admin'):
+            return jsonify({
+                'success': False,
+                'message': 'Acesso restrito a administradores!'
+            }), 403
+        return view(*args, **kwargs)
+    return wrapper
+
 # Rotas principais
 
 
@@ -158,42 +197,48 @@ def api_client_register():
     return AuthController.client_register()
 
 
+# Contadores do dashboard: alguns segundos de atraso são aceitáveis
+dashboard_swr = StaleWhileRevalidate(
+    config.SWR_DASHBOARD_FRESH_S, config.SWR_DASHBOARD_MAX_STALE_S, config.SWR_MAX_ENTRIES)
+
+
+def load_dashboard_stats(email=None):
+    """Contadores gerais (e do vendedor, se informado); None em caso de erro"""
+    from src.models.stats import Stats
+    # Contadores mantidos por triggers: leitura O(1), sem COUNT/SUM
+    stats = Stats.get()
+    if stats is None:
+        return None
+    data = dict(stats)
+    # Contadores do vendedor logado
+    if email:
+        data['seller'] = Stats.get(email)
+    return data
+
+
 @app.route('/api/dashboard_stats')
 def dashboard_stats():
     try:
-        from src.database.connection import get_db_connection
-        conn = get_db_connection()
-        if not conn:
+        email = session.get('user_email')
+        if config.SWR_ENABLED:
+            stats, _, age, state = dashboard_swr.get(
+                ('dashboard', email), lambda: load_dashboard_stats(email))
+        else:
+            stats, age, state = load_dashboard_stats(email), 0, None
+        if stats is None:
             return jsonify({
                 'success': False,
                 'message': 'Erro de conexão com banco de dados!'
             }), 500
 
-        # Contar produtos
-        cursor = conn.execute('SELECT COUNT(*) FROM produtos')
-        total_products = cursor.fetchone()[0]
-
-        # Contar clientes
-        cursor = conn.execute('SELECT COUNT(*) FROM clientes')
-        total_customers = cursor.fetchone()[0]
-
-        # Contar vendas
-        cursor = conn.execute('SELECT COUNT(*) FROM vendas')
-        total_sales = cursor.fetchone()[0]
+        response = {'success': True}
+        response.update(stats)
 
-        # Calcular receita total
-        cursor = conn.execute('SELECT SUM(total) FROM vendas')
-        total_revenue = cursor.fetchone()[0] or 0
-
-        conn.close()
-
-        return jsonify({
-            'success': True,
-            'total_products': total_products,
-            'total_customers': total_customers,
-            'total_sales': total_sales,
-            'total_revenue': total_revenue
-        })
+        response = jsonify(response)
+        if state is not None:
+            response.headers['Age'] = str(age)
+            response.headers['X-Cache'] = state
+        return response
 
     except Exception as e:
         print(f"Erro ao carregar estatísticas: {e}")
@@ -206,12 +251,12 @@ def dashboard_stats():
 @app.route('/api/check_db')
 def check_db():
     try:
-        from src.database.connection import get_db_connection
-        conn = get_db_connection()
+        from src.database.connection import get_db_connection, release_db_connection
+        conn = get_db_connection(readonly=True)
         if conn:
             cursor = conn.execute('SELECT COUNT(*) FROM users')
             count = cursor.fetchone()[0]
-            conn.close()
+            release_db_connection(conn)
             return jsonify({
                 'success': True,
                 'message': f'Banco conectado! {count} usuários encontrados.',
@@ -239,6 +284,62 @@ def debug():
         'environment': os.environ.get('FLASK_ENV', 'development')
     })
 
+@app.route('/api/admin/pool_stats')
+@admin_required
+def pool_stats():
+    """Estatísticas do pool de conexões"""
+    replica = get_catalog_replica()
+    return jsonify({
+        'success': True,
+        'pool': get_pool_stats(),
+        'write_queue': get_write_queue().stats(),
+        'catalog_replica': replica.stats() if replica else None,
+        'catalog_cache': catalog_cache.stats(),
+        'shared_cache': shared_catalog_cache.stats() if config.SHARED_CACHE_ENABLED else None,
+        'single_flight': get_single_flight_stats(),
+        'swr': {'catalog': catalog_swr.stats(), 'dashboard': dashboard_swr.stats()}
+    })
+
+
+@app.route('/api/admin/query_stats', methods=['GET', 'DELETE'])
+@admin_required
+def query_stats_endpoint():
+    """Latência, linhas e chamadas por consulta SQL (DELETE zera a tabela)"""
+    if request.method == 'DELETE':
+        query_stats.reset()
+    return jsonify({
+        'success': True,
+        'slow_threshold_ms': config.SLOW_QUERY_THRESHOLD_MS,
+        'queries': get_query_stats()
+    })
+
+
+
+@app.route('/api/admin/maintenance', methods=['GET', 'POST'])
+@admin_required
+def maintenance_endpoint():
+    """Histórico da manutenção do banco (POST pede uma rodada ao agendador)"""
+    scheduler = get_scheduler()
+    if request.method == 'POST':
+        if scheduler is None:
+            return jsonify({
+                'success': False,
+                'message': 'Agendador de manutenção desativado (MAINTENANCE_ENABLED)'
+            }), 409
+        # A rodada segura a escrita por um tempo: roda na thread, fora da requisição
+        request_run()
+        return jsonify({
+            'success': True,
+            'message': 'Manutenção agendada',
+            'scheduler': scheduler.stats(),
+            'runs': recent_runs()
+        }), 202
+    return jsonify({
+        'success': True,
+        'scheduler': scheduler.stats() if scheduler else None,
+        'runs': recent_runs()
+    })
+
 # APIs de Produtos
 
 
@@ -247,6 +348,21 @@ def api_add_product():
     return ProductController.create()
 
 
+@app.route('/api/products/bulk', methods=['POST'])
+def api_add_products_bulk():
+    return ProductController.create_bulk()
+
+
+@app.route('/api/sales', methods=['POST'])
+def api_create_sale():
+    return SaleController.create()
+
+
+@app.route('/api/export/<dataset>')
+def api_export(dataset):
+    return ExportController.export(dataset)
+
+
 @app.route('/api/get_products')
 def get_products():
     return ProductController.get_user_products()
@@ -261,9 +377,7 @@ def delete_product(product_id):
 def get_public_products():
     print("Acessando /api/public_products")
     try:
-        result = ProductController.get_all_products()
-        print(f"Resultado: {result}")
-        return result
+        return ProductController.get_all_products()
     except Exception as e:
         print(f"Erro na rota /api/public_products: {e}")
         return jsonify({
@@ -272,13 +386,16 @@ def get_public_products():
         }), 500
 
 
+@app.route('/api/search')
+def search_products():
+    return ProductController.search()
+
+
 @app.route('/api/categories')
 def get_categories():
     print("Acessando /api/categories")
     try:
-        result = ProductController.get_categories()
-        print(f"Resultado: {result}")
-        return result
+        return ProductController.get_categories()
     except Exception as e:
         print(f"Erro na rota /api/categories: {e}")
         return jsonify({
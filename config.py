@@ -13,6 +13,88 @@ PASSWORD_ALLOW_SPACES = False
 
 # Configurações do Banco de Dados
 DATABASE_NAME = "database.db"
+DB_POOL_SIZE = 5          # Conexões simultâneas por processo
+DB_POOL_TIMEOUT = 10      # Segundos aguardando uma conexão livre
+DB_PROFILE = "oltp"       # Perfil de PRAGMAs (ver src/database/profiles.py)
+DB_CLI_PROFILE = "oltp"   # Perfil usado pelo CLI (main.py)
+
+# Instrumentação de consultas SQL
+QUERY_STATS_ENABLED = True
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# Fila de escrita com commit agrupado
+WRITE_QUEUE_ENABLED = True
+WRITE_QUEUE_MAX_BATCH = 100       # Escritas por transação
+WRITE_QUEUE_MAX_DELAY_MS = 5      # Espera máxima para completar um lote
+
+# Particionamento por vendedor (um arquivo por usuario_email)
+# Para migrar dados existentes: python -m src.database.sharding
+SHARDING_ENABLED = False
+SHARD_DIR = "shards"
+
+# Busca textual do catálogo (/api/search)
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+# Paginação por cursor (/api/public_products e /api/get_products)
+PAGE_SIZE_DEFAULT = 24
+PAGE_SIZE_MAX = 100
+
+# Cadastro de produtos em lote (/api/products/bulk)
+BULK_MAX_PRODUCTS = 5000     # Produtos por requisição
+BULK_IMAGE_WORKERS = 8       # Threads gravando as imagens em paralelo
+
+# Exportações em streaming (/api/export/<products|clients|sales>?format=ndjson|csv)
+EXPORT_FETCH_ROWS = 1000             # Linhas lidas do cursor por vez
+EXPORT_CHUNK_BYTES = 64 * 1024       # Tamanho dos blocos enviados ao cliente
+
+# Réplica em memória do catálogo (produtos + users) em cada processo web
+# Não se aplica ao modo particionado
+CATALOG_REPLICA_ENABLED = False
+CATALOG_REPLICA_REFRESH_MS = 200  # Intervalo de verificação de alterações
+
+# Cache das listagens do catálogo (Product.get_all / get_page / get_categories)
+CATALOG_CACHE_ENABLED = True
+CATALOG_CACHE_MAX_BYTES = 8 * 1024 * 1024   # Limite de memória por processo
+CATALOG_CACHE_TTL_S = 60                     # Idade máxima de uma entrada
+
+# Cache compartilhado entre os workers do gunicorn (arquivo SQLite em WAL)
+# Segundo nível do cache do catálogo: só um worker recalcula após uma escrita
+SHARED_CACHE_ENABLED = True
+SHARED_CACHE_PATH = "cache.db"
+SHARED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+SHARED_CACHE_TTL_S = 600
+SHARED_CACHE_LOCK_TIMEOUT_S = 5       # Espera máxima pelo worker que recalcula
+
+# Stale-while-revalidate: respostas já prontas continuam sendo servidas
+# (com o header Age) enquanto são recalculadas em segundo plano
+SWR_ENABLED = True
+SWR_CATALOG_FRESH_S = 300        # Sem escrita, o corpo do catálogo vale por até 5 min
+SWR_CATALOG_MAX_STALE_S = 10     # Após uma escrita, o corpo antigo vale por até 10 s
+SWR_DASHBOARD_FRESH_S = 5        # Contadores do dashboard recalculados a cada 5 s
+SWR_DASHBOARD_MAX_STALE_S = 30
+SWR_MAX_ENTRIES = 512            # Chaves guardadas por processo
+
+# Arquivo morto mensal de vendas: python -m src.database.archive
+ARCHIVE_DIR = "archive"
+ARCHIVE_KEEP_MONTHS = 3   # Mês atual + 2 anteriores ficam na tabela quente
+
+# Base analítica em Parquet (requer pyarrow): python -m src.analytics.parquet_export
+ANALYTICS_DIR = "analytics"
+ANALYTICS_REPORTS = True          # Relatórios de análise leem o Parquet quando exportado
+ANALYTICS_EXPORT_CHUNK = 50000    # Linhas de vendas por leitura na exportação
+
+# Manutenção do banco (ANALYZE / PRAGMA optimize / incremental_vacuum)
+# CLI: python -m src.database.maintenance [--force] [--full-vacuum]
+MAINTENANCE_ENABLED = True            # Thread de manutenção no processo web
+MAINTENANCE_INTERVAL_S = 3600         # Roda pelo menos uma vez por hora...
+MAINTENANCE_WRITE_THRESHOLD = 1000    # ...ou após N transações de escrita
+MAINTENANCE_MIN_GAP_S = 300           # Intervalo mínimo entre execuções (todos os workers)
+MAINTENANCE_POLL_S = 60               # Ciclo do agendador (renova a vez entre os workers)
+MAINTENANCE_BUSY_WRITES_PER_S = 5     # Adia se houver mais commits/s que isso
+MAINTENANCE_VACUUM_PAGES = 1000       # Páginas devolvidas por incremental_vacuum
+MAINTENANCE_ANALYSIS_LIMIT = 400      # Linhas amostradas por índice no ANALYZE
 
 # Mensagens do Sistema
 WELCOME_MESSAGE = "Seja bem vindo ao sistema de login"
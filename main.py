@@ -1,70 +1,14 @@
-import sqlite3
 import hashlib
 import admin_view
 import user_view
 import config
+from src.database.migrations import apply_migrations
+from src.database import profiles, sharding
 
 
 def create_tables(connect):
-    """Cria as tabelas necessárias no banco de dados"""
-    # Tabela de usuários
-    connect.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            is_admin BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    # Tabela de produtos (centralizada)
-    connect.execute('''
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            preco REAL NOT NULL,
-            quantidade INTEGER NOT NULL,
-            categoria TEXT,
-            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            usuario_email TEXT NOT NULL,
-            FOREIGN KEY (usuario_email) REFERENCES users (email)
-        )
-    ''')
-
-    # Tabela de clientes (centralizada)
-    connect.execute('''
-        CREATE TABLE IF NOT EXISTS clientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            email TEXT,
-            telefone TEXT,
-            endereco TEXT,
-            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            usuario_email TEXT NOT NULL,
-            FOREIGN KEY (usuario_email) REFERENCES users (email)
-        )
-    ''')
-
-    # Tabela de vendas (centralizada)
-    connect.execute('''
-        CREATE TABLE IF NOT EXISTS vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER,
-            produto_id INTEGER,
-            quantidade INTEGER NOT NULL,
-            preco_unitario REAL NOT NULL,
-            total REAL NOT NULL,
-            data_venda TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            usuario_email TEXT NOT NULL,
-            FOREIGN KEY (cliente_id) REFERENCES clientes (id),
-            FOREIGN KEY (produto_id) REFERENCES produtos (id),
-            FOREIGN KEY (usuario_email) REFERENCES users (email)
-        )
-    ''')
-
-    connect.commit()
+    """Cria/atualiza as tabelas aplicando as migrações pendentes"""
+    apply_migrations(connect)
 
 
 def is_admin(connect, email):
@@ -159,7 +103,16 @@ def login(connect):
             print(config.USER_ACCESS)
             input("Pressione Enter para acessar o painel de usuário...")
             # Passa nome e email do usuário
-            user_view.user_panel(connect, user[1], email)
+            if config.SHARDING_ENABLED:
+                # Dados do vendedor ficam no shard dele
+                tenant_connect = sharding.connect_shard(
+                    email, config.DB_CLI_PROFILE)
+                try:
+                    user_view.user_panel(tenant_connect, user[1], email)
+                finally:
+                    tenant_connect.close()
+            else:
+                user_view.user_panel(connect, user[1], email)
     else:
         print("Email ou senha incorretos!")
         print("Verifique se digitou as credenciais corretamente.")
@@ -170,7 +123,7 @@ def main():
     print(config.WELCOME_MESSAGE)
 
     # Conectar ao banco de dados
-    connect = sqlite3.connect('database.db')
+    connect = profiles.connect(config.DATABASE_NAME, config.DB_CLI_PROFILE)
 
     # Criar tabelas
     create_tables(connect)
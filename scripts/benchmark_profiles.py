@@ -0,0 +1,80 @@
+"""Benchmark de leitura/escrita para cada perfil de desempenho do SQLite
+
+Uso: python -m scripts.benchmark_profiles [--rows 5000] [--reads 20000]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import sqlite3
+import time
+from src.database import profiles
+from src.database.migrations import apply_migrations
+
+
+def benchmark_profile(path, profile, rows, reads):
+    """Mede inserções (commit por linha e em lote) e leituras por vendedor"""
+    if profile is None:
+        conn = sqlite3.connect(path)  # padrão do SQLite (rollback journal)
+    else:
+        conn = profiles.connect(path, profile)
+    apply_migrations(conn)
+    sellers = [f'vendedor{i}@teste.com' for i in range(20)]
+    results = {}
+
+    # Escrita: um commit por produto (padrão do Product.create)
+    start = time.perf_counter()
+    for i in range(rows):
+        conn.execute('''
+            INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (f'Produto {i}', 10.0 + i, i % 50, 'Teste', random.choice(sellers)))
+        conn.commit()
+    results['insert_commit_por_linha'] = rows / (time.perf_counter() - start)
+
+    # Escrita: uma transação para o lote inteiro
+    start = time.perf_counter()
+    conn.executemany('''
+        INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(f'Lote {i}', 5.0, 1, 'Lote', random.choice(sellers))
+          for i in range(rows)])
+    conn.commit()
+    results['insert_em_lote'] = rows / (time.perf_counter() - start)
+
+    # Leitura: consultas indexadas por vendedor (padrão do get_by_user)
+    start = time.perf_counter()
+    for _ in range(reads):
+        conn.execute('''
+            SELECT id, nome, preco FROM produtos
+            WHERE usuario_email = ? ORDER BY data_cadastro DESC LIMIT 20
+        ''', (random.choice(sellers),)).fetchall()
+    results['leituras_por_vendedor'] = reads / (time.perf_counter() - start)
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--reads', type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_sqlite_')
+    try:
+        print(f"{'PERFIL':<22} {'COMMIT/LINHA':>14} {'LOTE':>14} {'LEITURAS':>14}  (ops/s)")
+        print("-"*72)
+        for profile in [None] + list(profiles.PROFILES):
+            name = profile or 'padrão'
+            path = os.path.join(workdir, f'{name}.db')
+            r = benchmark_profile(path, profile, args.rows, args.reads)
+            print(f"{name:<22} {r['insert_commit_por_linha']:>14.0f} "
+                  f"{r['insert_em_lote']:>14.0f} {r['leituras_por_vendedor']:>14.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Verificação de vendas_source com meses arquivados
+
+Arquiva vários meses de vendas e consulta o período pelos dois caminhos
+(tabelas anexadas com UNION ALL e cópia para a tabela temporária, quando os
+meses passam do limite de ATTACH), com e sem uma transação pendente na
+conexão. Confere o total lido, que nada fica anexado e que a transação
+pendente não é confirmada nem perdida.
+
+Uso: python -m scripts.check_archive [--months 21] [--attach-limit 10]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+
+import config
+
+SELLER = 'arquivo@teste.com'
+
+
+def setup(months):
+    """Cria (no diretório atual) uma venda por mês e arquiva os meses fechados"""
+    from src.database.archive import archive_closed_months
+    from src.database.connection import init_db
+    from src.database.migrations import apply_migrations
+    init_db()
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    apply_migrations(conn)
+    for index in range(months):
+        conn.execute('''
+            INSERT INTO vendas (cliente_id, produto_id, quantidade, preco_unitario,
+                                total, usuario_email, data_venda)
+            VALUES (1, 1, 1, 1.0, 1.0, ?, ?)
+        ''', (SELLER, f'{2000 + index // 12}-{index % 12 + 1:02d}-10 10:00:00'))
+    conn.commit()
+    archive_closed_months(conn, keep_months=1, today=date(2100, 1, 1))
+    conn.close()
+
+
+def check(months, attach_limit, pending):
+    """Lê o período inteiro; True se o resultado e a conexão ficarem corretos"""
+    from src.database import profiles
+    from src.database.archive import vendas_source
+    conn = profiles.connect(config.DATABASE_NAME)
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, attach_limit)
+    try:
+        if pending:
+            conn.execute("INSERT INTO users (name, email, password) VALUES ('P', 'p@teste.com', 'x')")
+        try:
+            with vendas_source(conn) as fonte:
+                vendas = conn.execute(f'SELECT COUNT(*) FROM {fonte}').fetchone()[0]
+            erro = None
+        except sqlite3.Error as e:
+            vendas, erro = None, e
+        attached = len(conn.execute('PRAGMA database_list').fetchall()) - 2
+        still_pending = conn.in_transaction
+        conn.rollback()
+        leaked = conn.execute(
+            "SELECT COUNT(*) FROM users WHERE email = 'p@teste.com'").fetchone()[0]
+    finally:
+        conn.close()
+
+    passed = (erro is None and vendas == months and attached == 0
+              and still_pending == pending and leaked == 0)
+    print(f"{'OK   ' if passed else 'FALHA'} limite de ATTACH={attach_limit:<3} "
+          f"transação pendente={pending!s:<5} "
+          f"vendas={vendas}/{months} anexados={attached} "
+          f"pendente depois={still_pending}" + (f" erro={erro}" if erro else ''))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--months', type=int, default=21)
+    parser.add_argument('--attach-limit', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='check_archive_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        setup(args.months)
+        ok = True
+        for attach_limit in (args.months, args.attach_limit):
+            for pending in (False, True):
+                ok = check(args.months, attach_limit, pending) and ok
+        print("OK: vendas arquivadas lidas sem afetar a transação" if ok
+              else "FALHA: leitura das vendas arquivadas")
+        raise SystemExit(0 if ok else 1)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Verificação do catálogo no modo particionado (um shard por vendedor)
+
+Cria vendedores com produtos de mesma data e mesmo preço em shards diferentes
+e pagina o catálogo público com cursor em todas as ordenações, conferindo que
+cada produto aparece exatamente uma vez e que os ids não se repetem entre shards.
+Também confere a busca textual pelo nome do vendedor, que fica no banco principal.
+
+Uso: python -m scripts.check_sharding [--sellers 3] [--products 4]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import config
+
+DATA_CADASTRO = '2024-01-01 00:00:00'
+# Uma palavra distinta por vendedor para a busca pelo nome
+NOMES = ['Alfa', 'Beta', 'Gama', 'Delta', 'Epsilon', 'Zeta', 'Eta', 'Teta', 'Iota', 'Kapa']
+
+
+def setup(sellers, products):
+    """Cria (no diretório atual) os vendedores e os produtos empatados nos shards"""
+    from src.database.connection import init_db
+    from src.database.migrations import apply_migrations
+    from src.database.sharding import get_tenant_write_queue
+    init_db()
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    apply_migrations(conn)
+    emails = [f'vendedor{n}@teste.com' for n in range(sellers)]
+    conn.executemany("INSERT INTO users (name, email, password) VALUES (?, ?, 'x')",
+                     [(f'Loja {NOMES[n]}', email) for n, email in enumerate(emails)])
+    conn.commit()
+    conn.close()
+
+    for email in emails:
+        queue = get_tenant_write_queue(email)
+        for n in range(products):
+            queue.submit_insert('''
+                INSERT INTO produtos (nome, preco, quantidade, categoria,
+                                      usuario_email, data_cadastro)
+                VALUES (?, 10.0, 1, 'Teste', ?, ?)
+            ''', (f'Produto {n}', email, DATA_CADASTRO)).result()
+    return emails
+
+
+def walk(sort, limit):
+    """Percorre o catálogo página a página; retorna os ids na ordem vista"""
+    from src.models.product import Product
+    filters = Product.catalog_filters({'sort': sort})
+    ids, cursor = [], None
+    while True:
+        products, cursor = Product.get_page(cursor, limit, filters)
+        ids.extend(product['id'] for product in products)
+        if not cursor:
+            return ids
+
+
+def search_sellers(emails, products):
+    """Busca cada vendedor pelo nome; True se achar exatamente os produtos dele"""
+    from src.models.product import Product
+    ok = True
+    for n, email in enumerate(emails):
+        found = Product.search(f'loja {NOMES[n].lower()}', limit=products * len(emails))
+        passed = (len(found) == products
+                  and all(product['usuario_email'] == email for product in found))
+        ok = ok and passed
+        print(f"{'OK   ' if passed else 'FALHA'} busca 'Loja {NOMES[n]}': "
+              f"{len(found)} produtos (esperado {products})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sellers', type=int, default=3, choices=range(1, len(NOMES) + 1))
+    parser.add_argument('--products', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='check_shards_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    config.SHARDING_ENABLED = True
+    try:
+        emails = setup(args.sellers, args.products)
+        total = args.sellers * args.products
+        ok = True
+        for sort in ('recent', 'price_asc', 'price_desc', 'name'):
+            for limit in (1, 2, total):
+                ids = walk(sort, limit)
+                passed = len(ids) == total and len(set(ids)) == total
+                ok = ok and passed
+                print(f"{'OK   ' if passed else 'FALHA'} sort={sort:<10} limit={limit:<3} "
+                      f"{len(ids)} produtos vistos, {len(set(ids))} ids distintos (de {total})")
+        ok = search_sellers(emails, args.products) and ok
+        print("OK: paginação e busca completas entre shards" if ok
+              else "FALHA: paginação ou busca perdeu ou repetiu produtos")
+        raise SystemExit(0 if ok else 1)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
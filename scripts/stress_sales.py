@@ -0,0 +1,126 @@
+"""Teste de carga das vendas: vários processos e threads vendendo o mesmo estoque
+
+Verifica que a baixa condicional de Sale.create nunca vende mais do que há
+em estoque e que estoque final + unidades vendidas = estoque inicial.
+
+Uso: python -m scripts.stress_sales [--stock 500] [--processes 4] [--threads 8]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+SELLER = 'stress@teste.com'
+
+
+def setup(stock):
+    """Cria (no diretório atual) o banco com um vendedor, um cliente e um produto"""
+    from src.database.connection import init_db
+    from src.database.migrations import apply_migrations
+    init_db()
+    conn = sqlite3.connect('database.db')
+    apply_migrations(conn)
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('Stress', ?, 'x')",
+                 (SELLER,))
+    cliente_id = conn.execute(
+        "INSERT INTO clientes (nome, usuario_email) VALUES ('Cliente', ?)",
+        (SELLER,)).lastrowid
+    produto_id = conn.execute('''
+        INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email)
+        VALUES ('Produto disputado', 10.0, ?, 'Teste', ?)
+    ''', (stock, SELLER)).lastrowid
+    conn.commit()
+    conn.close()
+    return cliente_id, produto_id
+
+
+def worker(cliente_id, produto_id, threads, results):
+    """Processo com várias threads vendendo até o estoque acabar"""
+    import threading
+    from src.models.sale import Sale, SaleError
+
+    def sell(counters):
+        while True:
+            quantidade = random.randint(1, 3)
+            try:
+                sale = Sale.create(SELLER, cliente_id, produto_id, quantidade)
+            except SaleError:
+                counters['recusadas'] += 1
+                # Recusa com 1 unidade: o estoque acabou
+                if quantidade == 1:
+                    return
+                continue
+            if sale is None:
+                counters['erros'] += 1
+                continue
+            counters['vendas'] += 1
+            counters['unidades'] += quantidade
+
+    per_thread = [dict(vendas=0, unidades=0, recusadas=0, erros=0) for _ in range(threads)]
+    pool = [threading.Thread(target=sell, args=(counters,)) for counters in per_thread]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put({key: sum(counters[key] for counters in per_thread)
+                 for key in per_thread[0]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='stress_vendas_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        cliente_id, produto_id = setup(args.stock)
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        processes = [multiprocessing.Process(
+            target=worker, args=(cliente_id, produto_id, args.threads, results))
+            for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        totals = dict(vendas=0, unidades=0, recusadas=0, erros=0)
+        for _ in processes:
+            for key, value in results.get().items():
+                totals[key] += value
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect('database.db')
+        estoque = conn.execute('SELECT quantidade FROM produtos WHERE id = ?',
+                               (produto_id,)).fetchone()[0]
+        vendidas, registros = conn.execute(
+            'SELECT COALESCE(SUM(quantidade), 0), COUNT(*) FROM vendas WHERE produto_id = ?',
+            (produto_id,)).fetchone()
+        conn.close()
+
+        print(f"Processos x threads:  {args.processes} x {args.threads}")
+        print(f"Vendas confirmadas:   {totals['vendas']} ({totals['unidades']} unidades) "
+              f"em {elapsed:.2f}s")
+        print(f"Vendas recusadas:     {totals['recusadas']}   erros: {totals['erros']}")
+        print(f"Estoque inicial/final: {args.stock} / {estoque}")
+        print(f"Tabela vendas:        {registros} registros, {vendidas} unidades")
+
+        ok = (estoque >= 0 and vendidas == args.stock - estoque
+              and vendidas == totals['unidades'] and registros == totals['vendas']
+              and estoque == 0)
+        print("OK: nenhuma venda acima do estoque" if ok else "FALHA: estoque inconsistente")
+        raise SystemExit(0 if ok else 1)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# Exportação incremental de vendas, produtos e clientes para Parquet
+# Layout: ANALYTICS_DIR/<tabela>/vendedor=<chave>/mes=<YYYY-MM>/*.parquet
+import json
+import os
+import shutil
+from datetime import datetime
+import pandas as pd
+import config
+from src.database import profiles
+from src.database.archive import VENDAS_COLUMNS, vendas_source
+from src.database.sharding import list_shard_paths, seller_key
+
+try:
+    import pyarrow  # noqa: F401  (engine de Parquet do pandas)
+except ImportError:
+    pyarrow = None
+
+DIMENSIONS = {
+    'produtos': 'id, nome, preco, quantidade, categoria, data_cadastro, usuario_email, image_path',
+    'clientes': 'id, nome, email, telefone, endereco, data_cadastro, usuario_email',
+}
+_SEM_DATA = 'sem-data'
+
+
+def require_pyarrow():
+    """Falha com uma mensagem clara se o pyarrow não estiver instalado"""
+    if pyarrow is None:
+        raise ImportError(
+            "Biblioteca 'pyarrow' não encontrada! Para instalar: pip install pyarrow")
+
+
+def _state_path():
+    return os.path.join(config.ANALYTICS_DIR, '_state.json')
+
+
+def load_state():
+    """Marcas d'água da exportação, por arquivo de banco"""
+    try:
+        with open(_state_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    os.makedirs(config.ANALYTICS_DIR, exist_ok=True)
+    tmp = _state_path() + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, _state_path())
+
+
+def database_key(conn):
+    """Identifica o banco da conexão no arquivo de estado"""
+    for _, name, path in conn.execute('PRAGMA database_list').fetchall():
+        if name == 'main':
+            return os.path.abspath(path) if path else ''
+    return ''
+
+
+def forget_database(database):
+    """Descarta a marca d'água e as partições exportadas de um shard
+
+    Chamado quando os ids do shard são renumerados: a próxima exportação
+    regrava tudo com os ids novos, sem duplicar as vendas antigas.
+    """
+    state = load_state()
+    if state.pop(os.path.abspath(database), None) is not None:
+        _save_state(state)
+    vendedor = os.path.splitext(os.path.basename(database))[0]
+    for table in ('vendas', *DIMENSIONS):
+        shutil.rmtree(os.path.join(config.ANALYTICS_DIR, table, f'vendedor={vendedor}'),
+                      ignore_errors=True)
+
+
+def _partition(df, date_column):
+    """Acrescenta as colunas de partição (vendedor e mês)"""
+    return df.assign(
+        vendedor=df['usuario_email'].map(seller_key),
+        mes=df[date_column].str[:7].fillna(_SEM_DATA))
+
+
+def _write_partitions(df, base, filename):
+    """Grava um arquivo por (vendedor, mês) sob base/"""
+    for (vendedor, mes), group in df.groupby(['vendedor', 'mes']):
+        directory = os.path.join(base, f'vendedor={vendedor}', f'mes={mes}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, filename)
+        group.drop(columns=['vendedor', 'mes']).to_parquet(
+            path + '.tmp', engine='pyarrow', index=False)
+        os.replace(path + '.tmp', path)
+
+
+def export_vendas(conn, state):
+    """Exporta as vendas com id acima da marca d'água (inclui meses arquivados)
+
+    Cada lote vira um arquivo part-<primeiro id> por partição; repetir um
+    lote interrompido sobrescreve o mesmo arquivo.
+    """
+    exported = 0
+    base = os.path.join(config.ANALYTICS_DIR, 'vendas')
+    with vendas_source(conn) as fonte:
+        chunks = pd.read_sql_query(
+            f'SELECT {VENDAS_COLUMNS} FROM {fonte} WHERE id > ? ORDER BY id',
+            conn, params=(state.get('vendas_id', 0),),
+            chunksize=config.ANALYTICS_EXPORT_CHUNK)
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            _write_partitions(_partition(chunk, 'sale_day'), base,
+                              f"part-{int(chunk['id'].iloc[0]):012d}.parquet")
+            state['vendas_id'] = int(chunk['id'].iloc[-1])
+            exported += len(chunk)
+    return exported
+
+
+def _owned_sellers(table, database):
+    """Vendedores cujas partições este banco substitui na exportação"""
+    base = os.path.join(config.ANALYTICS_DIR, table)
+    if config.SHARDING_ENABLED:
+        # O nome do arquivo do shard é a chave do vendedor
+        return {os.path.splitext(os.path.basename(database))[0]}
+    if not os.path.isdir(base):
+        return set()
+    return {name.split('=', 1)[1] for name in os.listdir(base)
+            if name.startswith('vendedor=')}
+
+
+def export_dimension(conn, table, database):
+    """Regrava o retrato de produtos ou clientes de cada vendedor do banco"""
+    df = pd.read_sql_query(f'SELECT {DIMENSIONS[table]} FROM {table}', conn)
+    df = _partition(df, 'data_cadastro')
+    base = os.path.join(config.ANALYTICS_DIR, table)
+    staging = f'{base}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    _write_partitions(df, staging, 'snapshot.parquet')
+    # Troca vendedor a vendedor; vendedores sem linhas perdem a partição
+    for vendedor in set(df['vendedor']) | _owned_sellers(table, database):
+        final = os.path.join(base, f'vendedor={vendedor}')
+        shutil.rmtree(final, ignore_errors=True)
+        staged = os.path.join(staging, f'vendedor={vendedor}')
+        if os.path.isdir(staged):
+            os.makedirs(base, exist_ok=True)
+            os.replace(staged, final)
+    shutil.rmtree(staging, ignore_errors=True)
+    return len(df)
+
+
+def export_database(conn):
+    """Exporta um banco (principal ou shard) para a base analítica"""
+    require_pyarrow()
+    database = database_key(conn)
+    state = load_state()
+    db_state = state.setdefault(database, {})
+    vendas = export_vendas(conn, db_state)
+    # Marca d'água salva antes das dimensões: vendas já gravadas não repetem
+    _save_state(state)
+    for table in DIMENSIONS:
+        export_dimension(conn, table, database)
+    db_state['exported_at'] = datetime.now().isoformat(timespec='seconds')
+    _save_state(state)
+    return vendas
+
+
+def export_all():
+    """Exporta o banco principal ou, no modo particionado, todos os shards"""
+    databases = list_shard_paths() if config.SHARDING_ENABLED else [config.DATABASE_NAME]
+    for database in databases:
+        # Sem readonly: muitos meses arquivados exigem uma tabela TEMP
+        conn = profiles.connect(database, 'readonly_analytics')
+        try:
+            vendas = export_database(conn)
+            print(f"{database}: {vendas} novas vendas exportadas")
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    export_all()
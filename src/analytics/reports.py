@@ -0,0 +1,131 @@
+# Agregações dos relatórios de vendas sobre a base analítica (Parquet)
+# As funções de agregação recebem um DataFrame de vendas detalhadas e servem
+# tanto para os dados lidos do Parquet quanto para os lidos do SQLite.
+import glob
+import os
+import pandas as pd
+import config
+from src.analytics.parquet_export import database_key, load_state, pyarrow
+from src.database.archive import iter_vendas_tables
+from src.database.sharding import seller_key
+
+# Os ids de cliente e produto ficam no fim: os rankings agrupam por id e nome,
+# como os GROUP BY do SQL, e não juntam homônimos
+SALES_COLUMNS = ['id', 'cliente', 'produto', 'quantidade',
+                 'preco_unitario', 'total', 'data_venda', 'cliente_id', 'produto_id']
+
+
+def _last_sale_id(conn, usuario_email):
+    """Maior id de venda do vendedor (tabela quente ou, se vazia, arquivadas)"""
+    row = conn.execute('SELECT MAX(id) FROM vendas WHERE usuario_email = ?',
+                       (usuario_email,)).fetchone()
+    if row[0] is not None:
+        return row[0]
+    # Ids arquivados são sempre menores que os da tabela quente
+    last = 0
+    for table in iter_vendas_tables(conn):
+        cursor = conn.execute(f'SELECT MAX(id) FROM {table} WHERE usuario_email = ?',
+                              (usuario_email,))
+        last = max(last, cursor.fetchone()[0] or 0)
+        cursor.close()
+    return last
+
+
+def available(conn, usuario_email):
+    """Indica se o Parquet tem todas as vendas do vendedor
+
+    Só vale quando a marca d'água do banco (último vendas.id exportado) já
+    cobre a venda mais recente do vendedor; senão o relatório lê do SQLite.
+    """
+    if not config.ANALYTICS_REPORTS or pyarrow is None:
+        return False
+    directory = os.path.join(config.ANALYTICS_DIR, 'vendas',
+                             f'vendedor={seller_key(usuario_email)}')
+    if not os.path.isdir(directory):
+        return False
+    watermark = load_state().get(database_key(conn), {}).get('vendas_id', 0)
+    return _last_sale_id(conn, usuario_email) <= watermark
+
+
+def exported_at(conn):
+    """Data da última exportação do banco da conexão (texto ISO) ou None"""
+    return load_state().get(database_key(conn), {}).get('exported_at')
+
+
+def _read(table, usuario_email, columns, desde=None, ate=None):
+    """Lê só as partições do vendedor e dos meses pedidos"""
+    pattern = os.path.join(config.ANALYTICS_DIR, table,
+                           f'vendedor={seller_key(usuario_email)}', 'mes=*')
+    files = []
+    for directory in sorted(glob.glob(pattern)):
+        month = directory.rsplit('=', 1)[1]
+        if desde and month < desde[:7]:
+            continue
+        if ate and month > ate[:7]:
+            continue
+        files.extend(sorted(glob.glob(os.path.join(directory, '*.parquet'))))
+    if not files:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_parquet(path, columns=columns) for path in files],
+                     ignore_index=True)
+
+
+def sales_frame(usuario_email, desde=None, ate=None):
+    """Vendas do vendedor com nomes de cliente e produto (como o JOIN do SQL)"""
+    vendas = _read('vendas', usuario_email,
+                   ['id', 'cliente_id', 'produto_id', 'quantidade',
+                    'preco_unitario', 'total', 'data_venda', 'sale_day'],
+                   desde, ate)
+    if desde:
+        vendas = vendas[vendas['sale_day'] >= desde]
+    if ate:
+        vendas = vendas[vendas['sale_day'] <= ate]
+
+    produtos = _read('produtos', usuario_email, ['id', 'nome']).rename(
+        columns={'id': 'produto_id', 'nome': 'produto'})
+    clientes = _read('clientes', usuario_email, ['id', 'nome']).rename(
+        columns={'id': 'cliente_id', 'nome': 'cliente'})
+    df = vendas.merge(clientes, on='cliente_id').merge(produtos, on='produto_id')
+    return df.sort_values('data_venda', ascending=False)[SALES_COLUMNS].reset_index(drop=True)
+
+
+def summary(df):
+    """Totais gerais: vendas, valor, ticket médio, período e itens únicos"""
+    datas = df['data_venda'].dropna().str[:10]
+    total = float(df['total'].sum())
+    return {
+        'vendas': len(df),
+        'valor_total': total,
+        'ticket_medio': total / len(df) if len(df) else 0,
+        'primeira_venda': datas.min() if not datas.empty else 'N/A',
+        'ultima_venda': datas.max() if not datas.empty else 'N/A',
+        'clientes_unicos': df['cliente_id'].nunique(),
+        'produtos_unicos': df['produto_id'].nunique(),
+    }
+
+
+def top_products(df, limit=None):
+    """Produtos por quantidade vendida (quantidade, nº de vendas, valor)"""
+    result = (df.groupby(['produto_id', 'produto'], as_index=False)
+              .agg(quantidade=('quantidade', 'sum'), vendas=('id', 'count'),
+                   total=('total', 'sum'))
+              .sort_values('quantidade', ascending=False, kind='stable'))
+    return result.head(limit) if limit else result
+
+
+def top_clients(df, limit=None):
+    """Clientes por valor comprado (nº de compras, quantidade, valor)"""
+    result = (df.groupby(['cliente_id', 'cliente'], as_index=False)
+              .agg(compras=('id', 'count'), quantidade=('quantidade', 'sum'),
+                   total=('total', 'sum'))
+              .sort_values('total', ascending=False, kind='stable'))
+    return result.head(limit) if limit else result
+
+
+def monthly_totals(df):
+    """Número de vendas e valor por mês (YYYY-MM), em ordem cronológica"""
+    return (df.dropna(subset=['data_venda'])
+            .assign(mes=lambda frame: frame['data_venda'].str[:7])
+            .groupby('mes', as_index=False)
+            .agg(vendas=('id', 'count'), total=('total', 'sum'))
+            .sort_values('mes'))
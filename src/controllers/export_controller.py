@@ -0,0 +1,64 @@
+from datetime import datetime
+from flask import Response, jsonify, request, session, stream_with_context
+from src.models.export import Export
+from src.utils.export import EXPORT_FORMATS
+
+
+class ExportController:
+    @staticmethod
+    def export(dataset):
+        """Controlador das exportações em streaming (products, clients, sales)
+
+        ?format=ndjson (padrão) ou csv; sales aceita ?desde=YYYY-MM-DD.
+        Uma falha no meio interrompe a conexão, para que o cliente não tome
+        uma exportação parcial por completa.
+        """
+        try:
+            if 'user_id' not in session:
+                return jsonify({
+                    'success': False,
+                    'message': 'Usuário não está logado!'
+                }), 401
+
+            export_format = request.args.get('format', 'ndjson').strip().lower()
+            if export_format not in EXPORT_FORMATS:
+                return jsonify({
+                    'success': False,
+                    'message': 'Formato inválido! Use ndjson ou csv.'
+                }), 400
+
+            usuario_email = session['user_email']
+            if dataset == 'products':
+                columns, rows = Export.PRODUCT_COLUMNS, Export.products(usuario_email)
+            elif dataset == 'clients':
+                columns, rows = Export.CLIENT_COLUMNS, Export.clients(usuario_email)
+            elif dataset == 'sales':
+                desde = request.args.get('desde', '').strip() or None
+                if desde:
+                    try:
+                        datetime.strptime(desde, '%Y-%m-%d')
+                    except ValueError:
+                        return jsonify({
+                            'success': False,
+                            'message': 'Data inválida! Use AAAA-MM-DD.'
+                        }), 400
+                columns, rows = Export.SALE_COLUMNS, Export.sales(usuario_email, desde)
+            else:
+                return jsonify({
+                    'success': False,
+                    'message': 'Exportação não encontrada!'
+                }), 404
+
+            stream, mimetype, extension = EXPORT_FORMATS[export_format]
+            filename = f'{dataset}_{datetime.now():%Y%m%d_%H%M%S}.{extension}'
+            response = Response(stream_with_context(stream(columns, rows)), mimetype=mimetype)
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+
+        except Exception as e:
+            print(f"Erro ao exportar {dataset}: {e}")
+            return jsonify({
+                'success': False,
+                'message': 'Erro interno do servidor!'
+            }), 500
@@ -1,8 +1,124 @@
-from flask import jsonify, request, session
+import json
+from flask import Response, jsonify, request, session
+import config
 from src.models.product import Product
+from src.utils.compression import ENCODINGS, preferred_encoding
+from src.utils.swr import StaleWhileRevalidate
+
+# Últimos corpos bons do catálogo público, servidos enquanto são recalculados
+catalog_swr = StaleWhileRevalidate(
+    config.SWR_CATALOG_FRESH_S, config.SWR_CATALOG_MAX_STALE_S, config.SWR_MAX_ENTRIES)
 
 
 class ProductController:
+    @staticmethod
+    def _etag(token, encoding):
+        """ETag de uma variante: cada codificação enviada tem o seu"""
+        return f'catalog-{token}' if encoding == 'identity' else f'catalog-{token}-{encoding}'
+
+    @staticmethod
+    def _not_modified(token, changed_at):
+        """Validador da versão atual que o cliente já tem, ou None
+
+        Retorna o ETag enviado em If-None-Match (de qualquer codificação, pois
+        o corpo decodificado é o mesmo) ou '' quando só If-Modified-Since
+        confirma a versão.
+        """
+        if request.if_none_match:
+            for encoding in ENCODINGS:
+                etag = ProductController._etag(token, encoding)
+                if request.if_none_match.contains_weak(etag):
+                    return etag
+            return None
+        if changed_at and request.if_modified_since and changed_at <= request.if_modified_since:
+            return ''
+        return None
+
+    @staticmethod
+    def _catalog_response(key, load_body, encoding, error_message):
+        """Resposta do catálogo: 304, corpo em cache (SWR) ou recalculado
+
+        O ETag e o Last-Modified vêm da versão do catálogo e da codificação
+        de fato enviada (sem brotli, por exemplo, vai a variante gzip). Se o
+        cliente já tem a versão atual, responde 304 sem consultar nem
+        serializar nada. Com SWR_ENABLED, depois de uma escrita o último
+        corpo bom continua sendo enviado (com Age) enquanto é recalculado.
+        """
+        version = Product.catalog_version()
+        age, state = 0, None
+        etag = ProductController._not_modified(*version) if version[0] is not None else None
+        if etag is None:
+            if config.SWR_ENABLED and version[0] is not None:
+                body, version, age, state = catalog_swr.get(
+                    key, load_body, Product.catalog_version)
+            else:
+                body = load_body()
+            if body is None:
+                response = jsonify({'success': False, 'message': error_message})
+                response.headers['Vary'] = 'Accept-Encoding'
+                return response, 500
+            # Corpo velho servido pelo SWR: o cliente pode já ter essa versão
+            if version[0] is not None:
+                etag = ProductController._not_modified(*version)
+
+        if etag is not None:
+            response = Response(status=304)
+        else:
+            response = body.response(encoding)
+            if version[0] is not None:
+                etag = ProductController._etag(
+                    version[0], response.headers.get('Content-Encoding', 'identity'))
+
+        response.headers['Vary'] = 'Accept-Encoding'
+        if state is not None:
+            response.headers['Age'] = str(age)
+            response.headers['X-Cache'] = state
+        token, changed_at = version
+        if token is not None:
+            # 304 confirmado só pela data: sem ETag, o do cliente continua valendo
+            if etag:
+                response.set_etag(etag)
+            if changed_at:
+                response.last_modified = changed_at
+            # O navegador guarda a resposta, mas revalida a cada uso
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @staticmethod
+    def _page_args():
+        """Lê cursor e limit da query string (limit limitado a PAGE_SIZE_MAX)"""
+        cursor = request.args.get('cursor', '').strip() or None
+        limit = int(request.args.get('limit', config.PAGE_SIZE_DEFAULT))
+        if cursor:
+            Product.decode_cursor(cursor)
+        return cursor, max(1, min(limit, config.PAGE_SIZE_MAX))
+
+    @staticmethod
+    def _validate_product(name, price, quantity, category):
+        """Valida os campos de um produto; retorna (campos convertidos, None) ou (None, erro)"""
+        if not name:
+            return None, 'Nome do produto é obrigatório!'
+
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None, 'Preço inválido!'
+        if price < 0:
+            return None, 'Preço deve ser maior ou igual a zero!'
+
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return None, 'Quantidade inválida!'
+        if quantity < 0:
+            return None, 'Quantidade deve ser maior ou igual a zero!'
+
+        if not category:
+            return None, 'Categoria é obrigatória!'
+
+        return {'nome': name, 'preco': price, 'quantidade': quantity,
+                'categoria': category}, None
+
     @staticmethod
     def create():
         """Controlador para criar produtos"""
@@ -22,42 +138,12 @@ class ProductController:
             image = request.files.get('image')
 
             # Validações
-            if not name:
+            product, error = ProductController._validate_product(
+                name, price, quantity, category)
+            if error:
                 return jsonify({
                     'success': False,
-                    'message': 'Nome do produto é obrigatório!'
-                }), 400
-
-            try:
-                price = float(price)
-                if price < 0:
-                    return jsonify({
-                        'success': False,
-                        'message': 'Preço deve ser maior ou igual a zero!'
-                    }), 400
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'message': 'Preço inválido!'
-                }), 400
-
-            try:
-                quantity = int(quantity)
-                if quantity < 0:
-                    return jsonify({
-                        'success': False,
-                        'message': 'Quantidade deve ser maior ou igual a zero!'
-                    }), 400
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'message': 'Quantidade inválida!'
-                }), 400
-
-            if not category:
-                return jsonify({
-                    'success': False,
-                    'message': 'Categoria é obrigatória!'
+                    'message': error
                 }), 400
 
             if not image:
@@ -68,7 +154,8 @@ class ProductController:
 
             # Criar produto
             product_id = Product.create(
-                name, price, quantity, category, session['user_email'], image)
+                product['nome'], product['preco'], product['quantidade'],
+                product['categoria'], session['user_email'], image)
 
             if product_id:
                 return jsonify({
@@ -88,6 +175,98 @@ class ProductController:
                 'message': 'Erro interno do servidor!'
             }), 500
 
+    @staticmethod
+    def create_bulk():
+        """Controlador para criar vários produtos em uma requisição
+
+        Aceita um JSON (lista de produtos ou {"products": [...]}) ou um
+        multipart com o campo products (o mesmo JSON) e as imagens em images;
+        cada produto indica a sua pelo nome do arquivo no campo image.
+        Todas as linhas são validadas antes de gravar; o resultado é por linha.
+        """
+        try:
+            if 'user_id' not in session:
+                return jsonify({
+                    'success': False,
+                    'message': 'Usuário não está logado!'
+                }), 401
+
+            images = {}
+            try:
+                if request.is_json:
+                    rows = request.get_json(silent=True)
+                    if rows is None:
+                        raise ValueError('JSON inválido')
+                else:
+                    rows = json.loads(request.form.get('products', ''))
+                    images = {image.filename: image for image in request.files.getlist('images')}
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'JSON de produtos inválido!'
+                }), 400
+            if isinstance(rows, dict):
+                rows = rows.get('products')
+
+            if not isinstance(rows, list) or not rows:
+                return jsonify({
+                    'success': False,
+                    'message': 'Envie uma lista de produtos!'
+                }), 400
+            if len(rows) > config.BULK_MAX_PRODUCTS:
+                return jsonify({
+                    'success': False,
+                    'message': f'Máximo de {config.BULK_MAX_PRODUCTS} produtos por requisição!'
+                }), 400
+
+            # Validar todas as linhas antes de gravar qualquer uma
+            results = [None] * len(rows)
+            valid, positions, used_images = [], [], set()
+            for index, row in enumerate(rows):
+                if not isinstance(row, dict):
+                    results[index] = {'index': index, 'success': False,
+                                      'message': 'Produto inválido!'}
+                    continue
+                name = str(row.get('name') or '').strip()
+                category = str(row.get('category') or '').strip()
+                product, error = ProductController._validate_product(
+                    name, row.get('price'), row.get('quantity'), category)
+                image_name = str(row.get('image') or '')
+                if not error and image_name:
+                    if image_name not in images:
+                        error = f'Imagem {image_name} não enviada!'
+                    elif image_name in used_images:
+                        error = f'Imagem {image_name} usada em mais de um produto!'
+                    used_images.add(image_name)
+                if error:
+                    results[index] = {'index': index, 'success': False, 'message': error}
+                    continue
+                product['image'] = images.get(image_name) if image_name else None
+                valid.append(product)
+                positions.append(index)
+
+            if valid:
+                created = Product.create_bulk(valid, session['user_email'])
+                for index, (product_id, error) in zip(positions, created):
+                    results[index] = (
+                        {'index': index, 'success': True, 'id': product_id} if error is None
+                        else {'index': index, 'success': False, 'message': error})
+
+            created_count = sum(1 for result in results if result['success'])
+            return jsonify({
+                'success': created_count == len(rows),
+                'created': created_count,
+                'failed': len(rows) - created_count,
+                'results': results
+            }), 200 if created_count else 400
+
+        except Exception as e:
+            print(f"Erro ao adicionar produtos em lote: {e}")
+            return jsonify({
+                'success': False,
+                'message': 'Erro interno do servidor!'
+            }), 500
+
     @staticmethod
     def get_user_products():
         """Controlador para buscar produtos do usuário logado"""
@@ -98,7 +277,16 @@ class ProductController:
                     'message': 'Usuário não está logado!'
                 }), 401
 
-            products = Product.get_by_user(session['user_email'])
+            try:
+                cursor, limit = ProductController._page_args()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Parâmetros de paginação inválidos!'
+                }), 400
+
+            products, next_cursor = Product.get_page_by_user(
+                session['user_email'], cursor, limit)
             products_data = []
 
             for product in products:
@@ -114,7 +302,8 @@ class ProductController:
 
             return jsonify({
                 'success': True,
-                'products': products_data
+                'products': products_data,
+                'next_cursor': next_cursor
             })
 
         except Exception as e:
@@ -128,28 +317,80 @@ class ProductController:
     def get_all_products():
         """Controlador para buscar todos os produtos (público)"""
         try:
-            products = Product.get_all()
+            try:
+                cursor, limit = ProductController._page_args()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Parâmetros de paginação inválidos!'
+                }), 400
+
+            # categoria, q, seller, min_price, max_price, in_stock e sort: filtrados no SQL
+            try:
+                filters = Product.catalog_filters(request.args)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Filtros inválidos!'
+                }), 400
+
+            # Corpo pronto (JSON + gzip/brotli), refeito só quando o catálogo muda
+            encoding = preferred_encoding(request.accept_encodings)
+
+            return ProductController._catalog_response(
+                ('page', cursor, limit, filters),
+                lambda: Product.get_page_body(cursor, limit, filters),
+                encoding, 'Erro ao buscar produtos')
+
+        except Exception as e:
+            print(f"Erro ao buscar produtos públicos: {e}")
+            return jsonify({
+                'success': False,
+                'message': f'Erro ao buscar produtos: {str(e)}'
+            }), 500
+
+    @staticmethod
+    def search():
+        """Controlador para busca textual no catálogo (público)"""
+        try:
+            termo = request.args.get('q', '').strip()
+            try:
+                limit = int(request.args.get(
+                    'limit', config.SEARCH_DEFAULT_LIMIT))
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Limite inválido!'
+                }), 400
+            limit = max(1, min(limit, config.SEARCH_MAX_LIMIT))
+
+            if not termo:
+                return jsonify({
+                    'success': False,
+                    'message': 'Termo de busca é obrigatório!'
+                }), 400
+
+            products = Product.search(termo, limit)
             return jsonify({
                 'success': True,
                 'products': products
             })
 
         except Exception as e:
-            print(f"Erro ao buscar produtos públicos: {e}")
+            print(f"Erro na busca de produtos: {e}")
             return jsonify({
                 'success': False,
-                'message': f'Erro ao buscar produtos: {str(e)}'
+                'message': f'Erro na busca de produtos: {str(e)}'
             }), 500
 
     @staticmethod
     def get_categories():
         """Controlador para buscar categorias"""
         try:
-            categories = Product.get_categories()
-            return jsonify({
-                'success': True,
-                'categories': categories
-            })
+            encoding = preferred_encoding(request.accept_encodings)
+            return ProductController._catalog_response(
+                ('categories',), Product.get_categories_body,
+                encoding, 'Erro ao buscar categorias')
 
         except Exception as e:
             print(f"Erro ao buscar categorias: {e}")
@@ -0,0 +1,62 @@
+from flask import jsonify, request, session
+from src.models.sale import Sale, SaleError
+
+
+class SaleController:
+    # SaleError.code -> status HTTP
+    ERROR_STATUS = {'invalid': 400, 'not_found': 404, 'stock': 409}
+
+    @staticmethod
+    def create():
+        """Controlador para registrar uma venda (JSON: cliente_id, produto_id, quantidade)"""
+        try:
+            if 'user_id' not in session:
+                return jsonify({
+                    'success': False,
+                    'message': 'Usuário não está logado!'
+                }), 401
+
+            data = request.get_json(silent=True) or {}
+            try:
+                cliente_id = int(data.get('cliente_id'))
+                produto_id = int(data.get('produto_id'))
+                quantidade = int(data.get('quantidade'))
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'message': 'Cliente, produto e quantidade são obrigatórios!'
+                }), 400
+
+            try:
+                sale = Sale.create(session['user_email'], cliente_id, produto_id, quantidade)
+            except SaleError as e:
+                return jsonify({
+                    'success': False,
+                    'message': str(e)
+                }), SaleController.ERROR_STATUS.get(e.code, 400)
+
+            if sale is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Erro ao registrar venda!'
+                }), 500
+
+            return jsonify({
+                'success': True,
+                'message': 'Venda registrada com sucesso!',
+                'sale': {
+                    'id': sale.id,
+                    'cliente_id': sale.cliente_id,
+                    'produto_id': sale.produto_id,
+                    'quantidade': sale.quantidade,
+                    'preco_unitario': sale.preco_unitario,
+                    'total': sale.total
+                }
+            })
+
+        except Exception as e:
+            print(f"Erro ao registrar venda: {e}")
+            return jsonify({
+                'success': False,
+                'message': 'Erro interno do servidor!'
+            }), 500
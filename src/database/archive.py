@@ -0,0 +1,296 @@
+# Arquivamento mensal de vendas antigas
+# Meses fechados saem da tabela vendas (quente) para um arquivo SQLite por
+# mês; os relatórios anexam (ATTACH) apenas os meses do período consultado.
+import glob
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+import config
+from src.database import profiles
+from src.database.sharding import list_shard_paths
+
+VENDAS_COLUMNS = ('id, cliente_id, produto_id, quantidade, preco_unitario, '
+                  'total, data_venda, usuario_email, sale_day')
+# Colunas gravadas (sale_day é gerada a partir de data_venda)
+_STORED_COLUMNS = VENDAS_COLUMNS.rsplit(', ', 1)[0]
+_MONTH_FILE = re.compile(r'_(\d{4}-\d{2})\.db$')
+# Linhas por leitura ao copiar meses arquivados para a tabela temporária
+_COPY_ROWS = 10000
+
+
+def _database_file(conn):
+    """Arquivo do banco principal da conexão ('' para bancos em memória)"""
+    for _, name, path in conn.execute('PRAGMA database_list').fetchall():
+        if name == 'main':
+            return path or ''
+    return ''
+
+
+def archive_path(database, month):
+    """Arquivo de arquivo morto de um mês ('YYYY-MM') de um banco"""
+    stem = os.path.splitext(os.path.basename(database))[0]
+    return os.path.join(config.ARCHIVE_DIR, f'{stem}_{month}.db')
+
+
+def archived_months(database):
+    """Meses já arquivados de um banco, em ordem"""
+    if not database:
+        return []
+    stem = os.path.splitext(os.path.basename(database))[0]
+    pattern = os.path.join(config.ARCHIVE_DIR, f'{glob.escape(stem)}_*.db')
+    months = []
+    for path in glob.glob(pattern):
+        match = _MONTH_FILE.search(path)
+        if match and os.path.basename(path) == f'{stem}_{match.group(1)}.db':
+            months.append(match.group(1))
+    return sorted(months)
+
+
+def _month_range(month):
+    """Limites [início, fim) de sale_day para o mês"""
+    year, number = map(int, month.split('-'))
+    following = date(year + number // 12, number % 12 + 1, 1)
+    return f'{month}-01', following.isoformat()
+
+
+def _first_open_month(today, keep_months):
+    """Primeiro mês que permanece na tabela quente"""
+    index = today.year * 12 + today.month - 1 - (keep_months - 1)
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def _attach(conn, path, alias):
+    conn.execute('ATTACH DATABASE ? AS ' + alias, (path,))
+
+
+def _create_archive_schema(conn, alias):
+    """Tabela vendas do arquivo morto, com o mesmo índice por período"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {alias}.vendas (
+            id INTEGER PRIMARY KEY,
+            cliente_id INTEGER,
+            produto_id INTEGER,
+            quantidade INTEGER NOT NULL,
+            preco_unitario REAL NOT NULL,
+            total REAL NOT NULL,
+            data_venda TIMESTAMP,
+            usuario_email TEXT NOT NULL,
+            sale_day TEXT GENERATED ALWAYS AS (substr(data_venda, 1, 10)) VIRTUAL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {alias}.idx_vendas_usuario_dia
+        ON vendas (usuario_email, sale_day, total)
+    ''')
+
+
+def archive_closed_months(conn, keep_months=None, today=None):
+    """Move os meses fechados de vendas para os arquivos mensais
+
+    Mantém na tabela quente o mês atual e os (keep_months - 1) anteriores.
+    A cópia é confirmada antes da remoção, então uma falha no meio deixa
+    no máximo linhas duplicadas, que a próxima execução remove.
+    """
+    database = _database_file(conn)
+    if not database:
+        return []
+    keep_months = keep_months or config.ARCHIVE_KEEP_MONTHS
+    cutoff = _first_open_month(today or date.today(), keep_months)
+    months = [row[0] for row in conn.execute('''
+        SELECT DISTINCT substr(sale_day, 1, 7) FROM vendas
+        WHERE sale_day < ? ORDER BY 1
+    ''', (f'{cutoff}-01',)).fetchall()]
+
+    os.makedirs(config.ARCHIVE_DIR, exist_ok=True)
+    conn.commit()
+    for month in months:
+        start, end = _month_range(month)
+        _attach(conn, archive_path(database, month), 'arquivo')
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            _create_archive_schema(conn, 'arquivo')
+            conn.execute(f'''
+                INSERT OR IGNORE INTO arquivo.vendas ({_STORED_COLUMNS})
+                SELECT {_STORED_COLUMNS} FROM main.vendas
+                WHERE sale_day >= ? AND sale_day < ?
+            ''', (start, end))
+            conn.commit()
+
+            conn.execute('BEGIN IMMEDIATE')
+            moved = '''
+                FROM main.vendas
+                WHERE sale_day >= ? AND sale_day < ?
+                  AND id IN (SELECT id FROM arquivo.vendas)
+            '''
+            per_seller = conn.execute(f'''
+                SELECT usuario_email, COUNT(*), COALESCE(SUM(total), 0)
+                {moved} GROUP BY usuario_email
+            ''', (start, end)).fetchall()
+            conn.execute('DELETE ' + moved, (start, end))
+            # Os triggers de stats descontaram as vendas removidas; arquivar
+            # não é excluir, então os totais históricos são restaurados
+            for email, count, revenue in per_seller:
+                conn.execute('''
+                    UPDATE stats
+                    SET total_sales = total_sales + ?, total_revenue = total_revenue + ?
+                    WHERE escopo IN ('*', ?)
+                ''', (count, revenue, email))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute('DETACH DATABASE arquivo')
+        print(f"Vendas de {month} arquivadas em {archive_path(database, month)}")
+    return months
+
+
+def shift_archived_ids(database, base):
+    """Soma base aos ids (e às referências) das vendas arquivadas de um banco
+
+    Usado quando um shard antigo recebe a sua faixa de ids; só linhas abaixo
+    de base mudam, então repetir após uma falha não desloca nada duas vezes.
+    Retorna quantas vendas arquivadas foram deslocadas.
+    """
+    shifted = 0
+    for month in archived_months(database):
+        conn = profiles.connect(archive_path(database, month))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                shifted += conn.execute('UPDATE vendas SET id = id + ? WHERE id < ?',
+                                        (base, base)).rowcount
+                for column in ('produto_id', 'cliente_id'):
+                    conn.execute(f'UPDATE vendas SET {column} = {column} + ? WHERE {column} < ?',
+                                 (base, base))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+    return shifted
+
+
+def _attach_limit(conn):
+    """Quantos bancos ainda podem ser anexados nesta conexão"""
+    attached = len(conn.execute('PRAGMA database_list').fetchall()) - 1
+    if hasattr(conn, 'getlimit'):
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    else:
+        limit = 10
+    return max(limit - attached, 0)
+
+
+def _copy_months(conn, database, months):
+    """Copia os meses arquivados para temp.vendas_arquivadas da conexão
+
+    Cada arquivo é lido por uma conexão própria, somente leitura, então a
+    conexão de quem chamou não anexa nada (DETACH falha dentro de uma
+    transação aberta) nem tem a transação dela confirmada: a cópia roda em
+    um SAVEPOINT, que dentro de uma transação pendente passa a fazer parte dela.
+    """
+    conn.execute(f'''
+        CREATE TEMP TABLE vendas_arquivadas AS
+        SELECT {VENDAS_COLUMNS} FROM main.vendas WHERE 0
+    ''')
+    placeholders = ', '.join('?' * len(VENDAS_COLUMNS.split(', ')))
+    conn.execute('SAVEPOINT vendas_source')
+    try:
+        for month in months:
+            source = profiles.connect(archive_path(database, month), readonly=True)
+            try:
+                cursor = source.execute(f'SELECT {VENDAS_COLUMNS} FROM vendas')
+                while True:
+                    rows = cursor.fetchmany(_COPY_ROWS)
+                    if not rows:
+                        break
+                    conn.executemany(
+                        f'INSERT INTO temp.vendas_arquivadas VALUES ({placeholders})', rows)
+            finally:
+                source.close()
+    except Exception:
+        conn.execute('ROLLBACK TO vendas_source')
+        raise
+    finally:
+        conn.execute('RELEASE vendas_source')
+
+
+@contextmanager
+def vendas_source(conn, desde=None, ate=None):
+    """Expressão FROM com as vendas do período (quentes + arquivadas)
+
+    Sem meses arquivados no período, devolve apenas 'vendas'. Se os meses
+    couberem no limite de ATTACH, une as tabelas anexadas com UNION ALL;
+    caso contrário, ou se a conexão tiver uma transação aberta, copia o
+    período para uma tabela temporária.
+    """
+    database = _database_file(conn)
+    months = [month for month in archived_months(database)
+              if (desde is None or month >= desde[:7])
+              and (ate is None or month <= ate[:7])]
+    if not months:
+        yield 'vendas'
+        return
+
+    hot = f'SELECT {VENDAS_COLUMNS} FROM main.vendas'
+    aliases = []
+    temp_table = False
+    try:
+        if len(months) <= _attach_limit(conn) and not conn.in_transaction:
+            for month in months:
+                alias = f"arquivo_{month.replace('-', '_')}"
+                _attach(conn, archive_path(database, month), alias)
+                aliases.append(alias)
+            parts = [hot] + [f'SELECT {VENDAS_COLUMNS} FROM {alias}.vendas'
+                             for alias in aliases]
+        else:
+            temp_table = True
+            _copy_months(conn, database, months)
+            parts = [hot, f'SELECT {VENDAS_COLUMNS} FROM temp.vendas_arquivadas']
+
+        yield '(' + ' UNION ALL '.join(parts) + ')'
+    finally:
+        for alias in aliases:
+            conn.execute(f'DETACH DATABASE {alias}')
+        if temp_table:
+            conn.execute('DROP TABLE IF EXISTS temp.vendas_arquivadas')
+
+
+def iter_vendas_tables(conn, desde=None):
+    """Gera, um por vez, as tabelas de vendas: meses arquivados e depois a quente
+
+    Anexa um único mês de cada vez, então não esbarra no limite de ATTACH nem
+    cria tabela temporária (funciona em conexões somente leitura). O cursor
+    de cada tabela deve ser fechado antes de pedir a próxima.
+    """
+    database = _database_file(conn)
+    for month in archived_months(database):
+        if desde is not None and month < desde[:7]:
+            continue
+        alias = f"arquivo_{month.replace('-', '_')}"
+        _attach(conn, archive_path(database, month), alias)
+        try:
+            yield f'{alias}.vendas'
+        finally:
+            conn.execute(f'DETACH DATABASE {alias}')
+    yield 'main.vendas'
+
+
+def archive_all():
+    """Arquiva os meses fechados do banco principal e de todos os shards"""
+    databases = [config.DATABASE_NAME]
+    if config.SHARDING_ENABLED:
+        databases += list_shard_paths()
+    for database in databases:
+        conn = profiles.connect(database)
+        try:
+            archive_closed_months(conn)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    archive_all()
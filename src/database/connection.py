@@ -1,90 +1,216 @@
 import sqlite3
 import os
+import threading
+import time
+from flask import g, has_app_context
+import config
+from src.database.migrations import apply_migrations, get_schema_version
+from src.database import profiles
 
-DATABASE = 'database.db'
+DATABASE = config.DATABASE_NAME
 
 
-def get_db_connection():
-    """Estabelece conexão com o banco de dados SQLite"""
-    try:
-        conn = sqlite3.connect(DATABASE)
+class ConnectionPool:
+    """Pool limitado e thread-safe de conexões SQLite"""
+
+    def __init__(self, database, max_size=5, timeout=10, profile=None, readonly=False):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.profile = profile
+        self.readonly = readonly
+        self._owned = set()
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'peak_in_use': 0,
+            'connections_created': 0
+        }
+
+    def _connect(self):
+        """Abre uma nova conexão física para o pool"""
+        conn = profiles.connect(
+            self.database, self.profile, readonly=self.readonly,
+            check_same_thread=False)
         conn.row_factory = sqlite3.Row
         return conn
+
+    def owns(self, conn):
+        """Indica se a conexão foi criada por este pool"""
+        return id(conn) in self._owned
+
+    def acquire(self):
+        """Retira uma conexão do pool, aguardando até timeout se estiver cheio"""
+        with self._cond:
+            if not self._idle and self._created >= self.max_size:
+                self._stats['waits'] += 1
+                deadline = time.monotonic() + self.timeout
+                while not self._idle and self._created >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise TimeoutError(
+                            'Nenhuma conexão disponível no pool')
+                    self._cond.wait(remaining)
+
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._created += 1
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            self._stats['peak_in_use'] = max(
+                self._stats['peak_in_use'], self._in_use)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['connections_created'] += 1
+                self._owned.add(id(conn))
+        return conn
+
+    def release(self, conn):
+        """Devolve uma conexão ao pool, descartando-a se estiver quebrada"""
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append(conn)
+            else:
+                self._created -= 1
+                self._owned.discard(id(conn))
+                conn.close()
+            self._cond.notify()
+
+    def close_all(self):
+        """Fecha as conexões ociosas do pool"""
+        with self._cond:
+            while self._idle:
+                conn = self._idle.pop()
+                self._owned.discard(id(conn))
+                conn.close()
+                self._created -= 1
+
+    def stats(self):
+        """Retorna as estatísticas de uso do pool"""
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                'profile': self.profile,
+                'readonly': self.readonly,
+                'max_size': self.max_size,
+                'open_connections': self._created,
+                'in_use': self._in_use,
+                'idle': len(self._idle)
+            })
+            return data
+
+
+_pools = {}
+_pools_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(readonly=False):
+    """Retorna o pool de leitura ou o de escrita do processo atual"""
+    global _pools, _pools_pid
+    # Workers do gunicorn não podem herdar conexões do processo pai
+    if not _pools or _pools_pid != os.getpid():
+        with _pool_lock:
+            if not _pools or _pools_pid != os.getpid():
+                profile = profiles.resolve_profile()
+                _pools = {
+                    # Leitores: somente leitura (mode=ro + query_only)
+                    'read': ConnectionPool(
+                        DATABASE, config.DB_POOL_SIZE, config.DB_POOL_TIMEOUT,
+                        profile, readonly=True),
+                    # Escritor único: escritas serializadas no processo
+                    'write': ConnectionPool(
+                        DATABASE, 1, config.DB_POOL_TIMEOUT, profile)
+                }
+                _pools_pid = os.getpid()
+    return _pools['read' if readonly else 'write']
+
+
+def get_pool_stats():
+    """Estatísticas dos pools de leitura e escrita (checkouts, esperas, pico)"""
+    return {
+        'read': get_pool(readonly=True).stats(),
+        'write': get_pool().stats()
+    }
+
+
+def get_db_connection(readonly=False):
+    """Obtém uma conexão do pool de leitura ou da conexão única de escrita
+
+    Dentro de uma requisição a conexão de leitura é reutilizada até o
+    teardown; a de escrita deve ser devolvida logo após o uso.
+    """
+    try:
+        if readonly and has_app_context():
+            if '_db_conn' not in g:
+                g._db_conn = get_pool(readonly=True).acquire()
+            return g._db_conn
+        return get_pool(readonly).acquire()
     except Exception as e:
         print(f"Erro ao conectar com banco: {e}")
         return None
 
 
+def release_db_connection(conn):
+    """Devolve a conexão ao pool (leituras da requisição voltam no teardown)"""
+    if conn is None:
+        return
+    if has_app_context() and g.get('_db_conn') is conn:
+        return
+    pool = get_pool()
+    if not pool.owns(conn):
+        pool = get_pool(readonly=True)
+    pool.release(conn)
+
+
+def close_request_connection(exception=None):
+    """Devolve ao pool a conexão de leitura associada à requisição atual"""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        get_pool(readonly=True).release(conn)
+
+
+def init_app(app):
+    """Registra a devolução da conexão ao pool no fim de cada requisição"""
+    app.teardown_appcontext(close_request_connection)
+
+
 def init_db():
-    """Inicializa o banco de dados criando as tabelas necessárias"""
+    """Inicializa o banco de dados aplicando as migrações pendentes"""
     conn = get_db_connection()
     if not conn:
         print("Não foi possível conectar ao banco de dados")
         return
 
     try:
-        # Tabela de usuários
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                is_admin INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Tabela de produtos
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS produtos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                preco REAL NOT NULL,
-                quantidade INTEGER NOT NULL,
-                categoria TEXT,
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario_email TEXT NOT NULL,
-                image_path TEXT,
-                FOREIGN KEY (usuario_email) REFERENCES users (email)
-            )
-        ''')
-
-        # Tabela de clientes
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS clientes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                email TEXT,
-                telefone TEXT,
-                endereco TEXT,
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario_email TEXT NOT NULL,
-                FOREIGN KEY (usuario_email) REFERENCES users (email)
-            )
-        ''')
-
-        # Tabela de vendas
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS vendas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER,
-                produto_id INTEGER,
-                quantidade INTEGER NOT NULL,
-                preco_unitario REAL NOT NULL,
-                total REAL NOT NULL,
-                data_venda TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario_email TEXT NOT NULL,
-                FOREIGN KEY (cliente_id) REFERENCES clientes (id),
-                FOREIGN KEY (produto_id) REFERENCES produtos (id),
-                FOREIGN KEY (usuario_email) REFERENCES users (email)
-            )
-        ''')
-
-        conn.commit()
-        print("Banco de dados inicializado com sucesso!")
+        apply_migrations(conn)
+        print(
+            f"Banco de dados inicializado com sucesso! (versão {get_schema_version(conn)})")
 
     except Exception as e:
         print(f"Erro ao inicializar banco: {e}")
     finally:
-        conn.close()
+        release_db_connection(conn)
@@ -0,0 +1,180 @@
+# Instrumentação de consultas: latência, linhas e chamadas por SQL normalizado
+import logging
+import re
+import sqlite3
+import threading
+import time
+import config
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+slow_query_logger = logging.getLogger('slow_queries')
+
+
+def _configure_slow_log():
+    """Direciona o log de consultas lentas para o arquivo configurado"""
+    if slow_query_logger.handlers or not config.SLOW_QUERY_LOG:
+        return
+    handler = logging.FileHandler(config.SLOW_QUERY_LOG, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.WARNING)
+    slow_query_logger.propagate = False
+
+
+def normalize_sql(sql):
+    """Normaliza o SQL para agrupar execuções da mesma consulta"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """Tabela agregada e thread-safe de estatísticas por consulta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, sql, elapsed_ms, rows):
+        """Registra uma execução finalizada da consulta"""
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None:
+                entry = self._queries[key] = {
+                    'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'slow_calls': 0}
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            slow = elapsed_ms >= config.SLOW_QUERY_THRESHOLD_MS
+            if slow:
+                entry['slow_calls'] += 1
+
+        if slow:
+            _configure_slow_log()
+            slow_query_logger.warning(
+                '%.1f ms | %d linhas | %s', elapsed_ms, rows, key)
+
+    def snapshot(self):
+        """Lista as consultas ordenadas pelo tempo total gasto"""
+        with self._lock:
+            items = [dict(entry, sql=key)
+                     for key, entry in self._queries.items()]
+        for item in items:
+            item['avg_ms'] = item['total_ms'] / item['calls']
+        return sorted(items, key=lambda item: item['total_ms'], reverse=True)
+
+    def reset(self):
+        """Zera as estatísticas acumuladas"""
+        with self._lock:
+            self._queries.clear()
+
+
+query_stats = QueryStats()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor que mede execução + leitura das linhas de cada comando"""
+
+    _sql = None
+
+    def _finish(self):
+        """Contabiliza o comando atual (uma única vez)"""
+        if self._sql is not None:
+            query_stats.record(self._sql, self._elapsed * 1000, self._rows)
+            self._sql = None
+
+    def _timed(self, method, sql, *args):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            self._sql = sql
+            self._elapsed = time.perf_counter() - start
+            self._rows = 0
+            # Comandos sem resultado (INSERT/UPDATE/DELETE) terminam aqui
+            if self.description is None:
+                self._rows = max(self.rowcount, 0)
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - start
+        return result
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if self._sql is not None:
+            self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexão cujos cursores registram estatísticas de cada consulta"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """Fábrica de conexões a usar em sqlite3.connect(factory=...)"""
+    return InstrumentedConnection if config.QUERY_STATS_ENABLED else sqlite3.Connection
+
+
+def get_query_stats():
+    """Tabela agregada das consultas executadas neste processo"""
+    return query_stats.snapshot()
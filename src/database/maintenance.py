@@ -0,0 +1,430 @@
+# Manutenção periódica do banco: estatísticas do planejador e espaço livre
+# Roda em uma thread dos processos web (um por vez) ou pelo CLI:
+#   python -m src.database.maintenance [--force] [--full-vacuum]
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+import config
+from src.database import profiles
+from src.database.connection import get_pool
+from src.database.sharding import get_shard, list_shard_paths
+
+
+def _databases():
+    """Bancos mantidos: o principal e, no modo particionado, os shards"""
+    databases = [config.DATABASE_NAME]
+    if config.SHARDING_ENABLED:
+        databases += list_shard_paths()
+    return databases
+
+
+def _file_size(database):
+    """Tamanho do banco somado ao WAL, em bytes"""
+    return sum(os.path.getsize(path) for path in (database, database + '-wal')
+               if os.path.exists(path))
+
+
+def local_write_count():
+    """Transações de escrita feitas por este processo (checkouts dos escritores)"""
+    total = get_pool().stats()['checkouts']
+    if config.SHARDING_ENABLED:
+        for path in list_shard_paths():
+            total += get_shard(path=path).write_pool.stats()['checkouts']
+    return total
+
+
+def measure_write_rate(conn, window=1.0, interval=0.05):
+    """Commits/s de outras conexões (limite inferior), via PRAGMA data_version
+
+    data_version muda quando outra conexão, de qualquer processo, faz
+    commit; cada amostra conta no máximo um commit.
+    """
+    last = conn.execute('PRAGMA data_version').fetchone()[0]
+    changes = 0
+    deadline = time.monotonic() + window
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        current = conn.execute('PRAGMA data_version').fetchone()[0]
+        if current != last:
+            changes += 1
+            last = current
+    return changes / window
+
+
+def maintain_database(conn, database, full_vacuum=False):
+    """Executa as tarefas de manutenção em um banco e mede cada uma
+
+    - ANALYZE completo se o banco ainda não tem estatísticas, senão
+      PRAGMA optimize (reanalisa só o que mudou);
+    - PRAGMA incremental_vacuum devolve até MAINTENANCE_VACUUM_PAGES páginas
+      livres ao sistema de arquivos (exige auto_vacuum = INCREMENTAL);
+    - full_vacuum converte bancos antigos para auto_vacuum incremental com
+      um VACUUM completo (bloqueia o banco: apenas pelo CLI);
+    - wal_checkpoint ao final, para o tamanho medido refletir o espaço liberado.
+    """
+    tasks = {}
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    size_before = _file_size(database)
+
+    start = time.perf_counter()
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    conn.execute(f'PRAGMA analysis_limit = {config.MAINTENANCE_ANALYSIS_LIMIT}')
+    if has_stats:
+        conn.execute('PRAGMA optimize').fetchall()
+        tasks['optimize_ms'] = (time.perf_counter() - start) * 1000
+    else:
+        conn.execute('ANALYZE')
+        conn.commit()
+        tasks['analyze_ms'] = (time.perf_counter() - start) * 1000
+
+    auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    start = time.perf_counter()
+    if auto_vacuum == 2:
+        # executescript percorre o comando até o fim (cada passo libera uma página)
+        conn.executescript(
+            f'PRAGMA incremental_vacuum({config.MAINTENANCE_VACUUM_PAGES});')
+        tasks['incremental_vacuum_ms'] = (time.perf_counter() - start) * 1000
+    elif full_vacuum:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        tasks['vacuum_ms'] = (time.perf_counter() - start) * 1000
+
+    # Leva as páginas do WAL para o arquivo principal, que então encolhe
+    start = time.perf_counter()
+    mode = 'TRUNCATE' if full_vacuum else 'PASSIVE'
+    conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchall()
+    tasks['checkpoint_ms'] = (time.perf_counter() - start) * 1000
+
+    free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return {
+        'banco': database,
+        'tasks': tasks,
+        'pages_freed': max(free_before - free_after, 0),
+        'bytes_reclaimed': max(free_before - free_after, 0) * page_size,
+        'size_before': size_before,
+        'size_after': _file_size(database),
+        'needs_full_vacuum': auto_vacuum != 2 and not full_vacuum and free_before > 0,
+    }
+
+
+def _claim_run(log_conn, force):
+    """Registra o início de uma execução; None se outro processo rodou há pouco
+
+    BEGIN IMMEDIATE serializa os workers do gunicorn que disputam a vez.
+    """
+    log_conn.execute('BEGIN IMMEDIATE')
+    try:
+        recent = log_conn.execute('''
+            SELECT 1 FROM maintenance_log
+            WHERE status IN ('running', 'ok')
+              AND started_at > datetime('now', ?)
+        ''', (f'-{config.MAINTENANCE_MIN_GAP_S} seconds',)).fetchone()
+        if recent and not force:
+            log_conn.rollback()
+            return None
+        run_id = log_conn.execute(
+            "INSERT INTO maintenance_log (banco, status) VALUES (?, 'running')",
+            (config.DATABASE_NAME,)).lastrowid
+        log_conn.commit()
+        return run_id
+    except Exception:
+        log_conn.rollback()
+        raise
+
+
+def _finish_run(log_conn, run_id, status, duration_ms, results, detail=None):
+    log_conn.execute('''
+        UPDATE maintenance_log
+        SET status = ?, duration_ms = ?, tasks = ?, bytes_reclaimed = ?, detail = ?
+        WHERE id = ?
+    ''', (status, duration_ms, json.dumps(results),
+          sum(result['bytes_reclaimed'] for result in results), detail, run_id))
+    log_conn.commit()
+
+
+def run_maintenance(force=False, full_vacuum=False):
+    """Executa a manutenção de todos os bancos, salvo se houver muita escrita
+
+    Retorna (status, resultados); status é 'ok', 'busy' ou 'recent'.
+    """
+    log_conn = profiles.connect(config.DATABASE_NAME)
+    try:
+        if not force:
+            rate = measure_write_rate(log_conn)
+            if rate > config.MAINTENANCE_BUSY_WRITES_PER_S:
+                return 'busy', []
+
+        run_id = _claim_run(log_conn, force)
+        if run_id is None:
+            return 'recent', []
+
+        start = time.perf_counter()
+        results = []
+        try:
+            for database in _databases():
+                conn = profiles.connect(database)
+                try:
+                    results.append(maintain_database(conn, database, full_vacuum))
+                finally:
+                    conn.close()
+        except Exception as e:
+            _finish_run(log_conn, run_id, 'error',
+                        (time.perf_counter() - start) * 1000, results, str(e))
+            raise
+        _finish_run(log_conn, run_id, 'ok',
+                    (time.perf_counter() - start) * 1000, results)
+        return 'ok', results
+    finally:
+        log_conn.close()
+
+
+def recent_runs(limit=20):
+    """Últimas execuções registradas em maintenance_log"""
+    conn = profiles.connect(config.DATABASE_NAME, readonly=True)
+    try:
+        rows = conn.execute('''
+            SELECT id, banco, started_at, status, duration_ms, tasks,
+                   bytes_reclaimed, detail
+            FROM maintenance_log ORDER BY id DESC LIMIT ?
+        ''', (limit,)).fetchall()
+    finally:
+        conn.close()
+    columns = ('id', 'banco', 'started_at', 'status', 'duration_ms',
+               'tasks', 'bytes_reclaimed', 'detail')
+    runs = [dict(zip(columns, row)) for row in rows]
+    for run in runs:
+        run['tasks'] = json.loads(run['tasks']) if run['tasks'] else []
+    return runs
+
+
+def _heartbeat(conn, owner, writes, ttl):
+    """Soma as escritas do processo e tenta ficar (ou seguir) com a vez
+
+    Uma única linha em maintenance_lease escolhe o processo que roda a
+    manutenção; a vez expira se o dono parar de renová-la. Retorna a linha
+    (owner, writes, writes_at_run, requested_at) após a atualização.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        now = time.time()
+        conn.execute('''
+            UPDATE maintenance_lease
+            SET writes = writes + ?,
+                owner = CASE WHEN owner IS NULL OR owner = ? OR expires_at < ?
+                             THEN ? ELSE owner END,
+                expires_at = CASE WHEN owner IS NULL OR owner = ? OR expires_at < ?
+                                  THEN ? ELSE expires_at END
+            WHERE id = 1
+        ''', (writes, owner, now, owner, owner, now, now + ttl))
+        row = conn.execute('''
+            SELECT owner, writes, writes_at_run, requested_at
+            FROM maintenance_lease WHERE id = 1
+        ''').fetchone()
+        conn.commit()
+        return row
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _last_run_age(conn):
+    """Segundos desde a última execução concluída (None se nunca rodou)"""
+    row = conn.execute('''
+        SELECT (julianday('now') - julianday(MAX(started_at))) * 86400
+        FROM maintenance_log WHERE status = 'ok'
+    ''').fetchone()
+    return row[0]
+
+
+def request_run():
+    """Pede uma execução forçada ao agendador que estiver com a vez"""
+    conn = profiles.connect(config.DATABASE_NAME)
+    try:
+        conn.execute('''
+            UPDATE maintenance_lease SET requested_at = CURRENT_TIMESTAMP
+            WHERE id = 1 AND requested_at IS NULL
+        ''')
+        conn.commit()
+    finally:
+        conn.close()
+    if _scheduler is not None and _scheduler_pid == os.getpid():
+        _scheduler.wake()
+
+
+class MaintenanceScheduler:
+    """Thread que dispara a manutenção por intervalo, após N escritas ou a pedido
+
+    Todo processo web tem a sua thread, que soma as escritas locais em
+    maintenance_lease; só o processo com a vez executa a manutenção.
+    """
+
+    def __init__(self, interval=3600, write_threshold=1000, poll=60):
+        self.interval = interval
+        self.write_threshold = write_threshold
+        self.poll = poll
+        # A vez dura alguns ciclos: um dono que parou é substituído logo
+        self.lease_ttl = poll * 3
+        self.owner = None
+        self._leader = False
+        self._thread = None
+        self._worker = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'runs': 0, 'skipped_busy': 0, 'skipped_recent': 0,
+                       'errors': 0, 'last_status': None, 'last_run_at': None}
+
+    def start(self):
+        """Inicia a thread (uma por processo)"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+            self._thread = threading.Thread(
+                target=self._run, name='db-maintenance', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Antecipa o próximo ciclo (pedido feito neste processo)"""
+        self._wake.set()
+
+    def _due(self, conn, row):
+        """Motivo para rodar agora ('request', 'writes', 'interval') ou None"""
+        _, writes, writes_at_run, requested_at = row
+        if requested_at is not None:
+            return 'request'
+        if writes - writes_at_run >= self.write_threshold:
+            return 'writes'
+        age = _last_run_age(conn)
+        if age is None or age >= self.interval:
+            return 'interval'
+        return None
+
+    def _cycle(self, conn, reported):
+        """Heartbeat e, com a vez, dispara a manutenção se devida
+
+        A rodada vai para outra thread para a vez continuar sendo renovada
+        enquanto ela dura. Retorna as escritas locais já informadas.
+        """
+        writes = local_write_count()
+        row = _heartbeat(conn, self.owner, writes - reported, self.lease_ttl)
+        self._leader = row[0] == self.owner
+        if not self._leader or (self._worker is not None and self._worker.is_alive()):
+            return writes
+        reason = self._due(conn, row)
+        if reason is not None:
+            self._worker = threading.Thread(
+                target=self._execute, args=(reason, row), name='db-maintenance-run',
+                daemon=True)
+            self._worker.start()
+        return writes
+
+    def _execute(self, reason, row):
+        """Uma rodada de manutenção; zera os gatilhos salvo se adiada"""
+        try:
+            status, _ = run_maintenance(force=reason == 'request')
+        except Exception as e:
+            print(f"Erro na manutenção do banco: {e}")
+            status = 'error'
+        with self._lock:
+            self._stats['last_status'] = status
+            if status == 'ok':
+                self._stats['runs'] += 1
+                self._stats['last_run_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            elif status == 'busy':
+                self._stats['skipped_busy'] += 1
+            elif status == 'recent':
+                self._stats['skipped_recent'] += 1
+            else:
+                self._stats['errors'] += 1
+        # Ocupado: tenta de novo no próximo ciclo sem zerar os gatilhos
+        if status == 'busy':
+            return
+        conn = profiles.connect(config.DATABASE_NAME)
+        try:
+            conn.execute('''
+                UPDATE maintenance_lease
+                SET writes_at_run = ?, requested_at = NULL
+                WHERE id = 1 AND requested_at IS ?
+            ''', (row[1], row[3]))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _run(self):
+        reported = local_write_count()
+        while True:
+            self._wake.wait(self.poll)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            conn = profiles.connect(config.DATABASE_NAME)
+            try:
+                reported = self._cycle(conn, reported)
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                print(f"Erro no agendador de manutenção: {e}")
+            finally:
+                conn.close()
+
+    def stats(self):
+        """Contadores da thread de manutenção deste processo"""
+        with self._lock:
+            data = dict(self._stats)
+        data['running'] = (self._thread is not None and self._thread.is_alive()
+                           and self._pid == os.getpid())
+        data['leader'] = data['running'] and self._leader
+        return data
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Agendador do processo atual, iniciado na primeira chamada; None se desativado
+
+    Iniciado sob demanda (primeira requisição de cada worker), não na
+    importação: com gunicorn --preload a thread ficaria só no processo mestre.
+    """
+    global _scheduler, _scheduler_pid
+    if not config.MAINTENANCE_ENABLED:
+        return None
+    if _scheduler_pid != os.getpid():
+        with _scheduler_lock:
+            if _scheduler_pid != os.getpid():
+                scheduler = MaintenanceScheduler(
+                    config.MAINTENANCE_INTERVAL_S, config.MAINTENANCE_WRITE_THRESHOLD,
+                    config.MAINTENANCE_POLL_S)
+                scheduler.start()
+                _scheduler, _scheduler_pid = scheduler, os.getpid()
+    return _scheduler
+
+
+if __name__ == '__main__':
+    status, results = run_maintenance(
+        force='--force' in sys.argv, full_vacuum='--full-vacuum' in sys.argv)
+    if status == 'busy':
+        print("Muitas escritas em andamento; manutenção adiada (use --force).")
+    elif status == 'recent':
+        print("Manutenção executada há pouco por outro processo (use --force).")
+    for result in results:
+        print(f"{result['banco']}: {json.dumps(result['tasks'])} | "
+              f"{result['bytes_reclaimed']} bytes recuperados")
+        if result['needs_full_vacuum']:
+            print("  auto_vacuum desativado: rode com --full-vacuum para converter")
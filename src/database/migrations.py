@@ -0,0 +1,386 @@
+# Migrações versionadas do esquema do banco de dados
+# A versão aplicada fica registrada em PRAGMA user_version
+
+
+def _column_exists(conn, table, column):
+    """Verifica se a coluna existe na tabela"""
+    cursor = conn.execute(f'PRAGMA table_info({table})')
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def _add_column_if_missing(conn, table, column, definition):
+    """Adiciona a coluna apenas se ela ainda não existir"""
+    if not _column_exists(conn, table, column):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _schema_inicial(conn):
+    """Cria as tabelas base (compatível com bancos criados antes das migrações)"""
+    # Tabela de usuários
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            is_admin INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabela de produtos
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            preco REAL NOT NULL,
+            quantidade INTEGER NOT NULL,
+            categoria TEXT,
+            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario_email TEXT NOT NULL,
+            image_path TEXT,
+            FOREIGN KEY (usuario_email) REFERENCES users (email)
+        )
+    ''')
+    # Bancos criados pelo CLI antigo não tinham a coluna de imagem
+    _add_column_if_missing(conn, 'produtos', 'image_path', 'TEXT')
+
+    # Tabela de clientes
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT,
+            telefone TEXT,
+            endereco TEXT,
+            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario_email TEXT NOT NULL,
+            FOREIGN KEY (usuario_email) REFERENCES users (email)
+        )
+    ''')
+
+    # Tabela de vendas
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER,
+            produto_id INTEGER,
+            quantidade INTEGER NOT NULL,
+            preco_unitario REAL NOT NULL,
+            total REAL NOT NULL,
+            data_venda TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usuario_email TEXT NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes (id),
+            FOREIGN KEY (produto_id) REFERENCES produtos (id),
+            FOREIGN KEY (usuario_email) REFERENCES users (email)
+        )
+    ''')
+
+
+def _counter_triggers(table, counter, revenue=False):
+    """Triggers que mantêm stats.<counter> (global '*' e por vendedor)"""
+    delta_new = f'{counter} = {counter} + 1'
+    delta_old = f'{counter} = {counter} - 1'
+    if revenue:
+        delta_new += ', total_revenue = total_revenue + NEW.total'
+        delta_old += ', total_revenue = total_revenue - OLD.total'
+    update_of = 'usuario_email, total' if revenue else 'usuario_email'
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT OR IGNORE INTO stats (escopo) VALUES ('*'), (NEW.usuario_email);
+            UPDATE stats SET {delta_new} WHERE escopo IN ('*', NEW.usuario_email);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE stats SET {delta_old} WHERE escopo IN ('*', OLD.usuario_email);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_update AFTER UPDATE OF {update_of} ON {table}
+        BEGIN
+            INSERT OR IGNORE INTO stats (escopo) VALUES (NEW.usuario_email);
+            UPDATE stats SET {delta_old} WHERE escopo IN ('*', OLD.usuario_email);
+            UPDATE stats SET {delta_new} WHERE escopo IN ('*', NEW.usuario_email);
+        END
+        ''',
+    ]
+
+
+def _stats_backfill(conn):
+    """Recalcula os contadores a partir das tabelas existentes"""
+    conn.execute('DELETE FROM stats')
+    conn.execute('''
+        INSERT INTO stats (escopo, total_products, total_customers, total_sales, total_revenue)
+        VALUES ('*',
+                (SELECT COUNT(*) FROM produtos),
+                (SELECT COUNT(*) FROM clientes),
+                (SELECT COUNT(*) FROM vendas),
+                (SELECT COALESCE(SUM(total), 0) FROM vendas))
+    ''')
+    conn.execute('''
+        INSERT INTO stats (escopo, total_products, total_customers, total_sales, total_revenue)
+        SELECT usuario_email, SUM(p), SUM(c), SUM(v), SUM(r) FROM (
+            SELECT usuario_email, COUNT(*) AS p, 0 AS c, 0 AS v, 0 AS r
+            FROM produtos GROUP BY usuario_email
+            UNION ALL
+            SELECT usuario_email, 0, COUNT(*), 0, 0 FROM clientes GROUP BY usuario_email
+            UNION ALL
+            SELECT usuario_email, 0, 0, COUNT(*), COALESCE(SUM(total), 0)
+            FROM vendas GROUP BY usuario_email
+        ) GROUP BY usuario_email
+    ''')
+
+
+def _stats_table(conn):
+    """Tabela stats mantida por triggers, com carga inicial dos contadores"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats (
+            escopo TEXT PRIMARY KEY,  -- '*' = global, senão usuario_email
+            total_products INTEGER NOT NULL DEFAULT 0,
+            total_customers INTEGER NOT NULL DEFAULT 0,
+            total_sales INTEGER NOT NULL DEFAULT 0,
+            total_revenue REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    for statement in (_counter_triggers('produtos', 'total_products')
+                      + _counter_triggers('clientes', 'total_customers')
+                      + _counter_triggers('vendas', 'total_sales', revenue=True)):
+        conn.execute(statement)
+    _stats_backfill(conn)
+
+
+def _catalog_fts(conn):
+    """Índice FTS5 do catálogo (nome, categoria, vendedor) mantido por triggers"""
+    # rowid do índice = produtos.id; remove_diacritics ignora acentos
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+            nome, categoria, vendedor_nome,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_insert AFTER INSERT ON produtos
+        BEGIN
+            INSERT INTO produtos_fts (rowid, nome, categoria, vendedor_nome)
+            VALUES (NEW.id, NEW.nome, NEW.categoria,
+                    (SELECT name FROM users WHERE email = NEW.usuario_email));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_delete AFTER DELETE ON produtos
+        BEGIN
+            DELETE FROM produtos_fts WHERE rowid = OLD.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_update
+        AFTER UPDATE OF nome, categoria, usuario_email ON produtos
+        BEGIN
+            UPDATE produtos_fts
+            SET nome = NEW.nome, categoria = NEW.categoria,
+                vendedor_nome = (SELECT name FROM users WHERE email = NEW.usuario_email)
+            WHERE rowid = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_fts_update AFTER UPDATE OF name ON users
+        BEGIN
+            UPDATE produtos_fts SET vendedor_nome = NEW.name
+            WHERE rowid IN (SELECT id FROM produtos WHERE usuario_email = NEW.email);
+        END
+    ''')
+    conn.execute('DELETE FROM produtos_fts')
+    conn.execute('''
+        INSERT INTO produtos_fts (rowid, nome, categoria, vendedor_nome)
+        SELECT p.id, p.nome, p.categoria, u.name
+        FROM produtos p
+        LEFT JOIN users u ON p.usuario_email = u.email
+    ''')
+
+
+def _normalized_dates(conn):
+    """Padroniza datas como 'YYYY-MM-DD HH:MM:SS' (UTC) e cria vendas.sale_day"""
+    # Product.create gravava datetime.now(): hora local com microssegundos
+    conn.execute('''
+        UPDATE produtos SET data_cadastro = datetime(data_cadastro, 'utc')
+        WHERE data_cadastro LIKE '%.%' AND datetime(data_cadastro, 'utc') IS NOT NULL
+    ''')
+    for table, column in (('produtos', 'data_cadastro'),
+                          ('clientes', 'data_cadastro'),
+                          ('vendas', 'data_venda')):
+        conn.execute(f'''
+            UPDATE {table} SET {column} = datetime({column})
+            WHERE datetime({column}) IS NOT NULL AND {column} != datetime({column})
+        ''')
+
+    # Coluna gerada: filtros por dia viram faixa no índice, sem DATE(data_venda)
+    conn.execute('''
+        ALTER TABLE vendas ADD COLUMN sale_day TEXT
+        GENERATED ALWAYS AS (substr(data_venda, 1, 10)) VIRTUAL
+    ''')
+    # total no índice: relatórios por período leem só o índice
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_vendas_usuario_dia
+        ON vendas (usuario_email, sale_day, total)
+    ''')
+
+
+def _catalog_changes(conn):
+    """Registro das linhas alteradas em produtos e users (réplica do catálogo)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,   -- produtos ou users
+            chave TEXT NOT NULL     -- produtos.id ou users.email
+        )
+    ''')
+    for table, key in (('produtos', 'id'), ('users', 'email')):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO catalog_changes (tabela, chave) VALUES ('{table}', NEW.{key});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT INTO catalog_changes (tabela, chave) VALUES ('{table}', NEW.{key});
+                INSERT INTO catalog_changes (tabela, chave)
+                SELECT '{table}', OLD.{key} WHERE OLD.{key} IS NOT NEW.{key};
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO catalog_changes (tabela, chave) VALUES ('{table}', OLD.{key});
+            END
+        ''')
+    # Guarda só as 10000 alterações mais recentes; uma réplica mais atrasada
+    # que isso recarrega o catálogo inteiro
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_catalog_changes_prune AFTER INSERT ON catalog_changes
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM catalog_changes WHERE seq <= NEW.seq - 10000;
+        END
+    ''')
+
+
+def _catalog_changes_time(conn):
+    """Hora de cada alteração do catálogo (Last-Modified das APIs públicas)"""
+    conn.execute('ALTER TABLE catalog_changes ADD COLUMN changed_at TEXT')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_catalog_changes_time AFTER INSERT ON catalog_changes
+        BEGIN
+            UPDATE catalog_changes SET changed_at = datetime('now') WHERE seq = NEW.seq;
+        END
+    ''')
+
+
+# Lista ordenada de migrações: (versão, descrição, callable ou lista de SQL)
+MIGRATIONS = [
+    (1, 'Esquema inicial', _schema_inicial),
+    (2, 'Índices das consultas por vendedor e das junções de vendas', [
+        # Product.get_by_user (ORDER BY data_cadastro)
+        'CREATE INDEX IF NOT EXISTS idx_produtos_usuario_data ON produtos (usuario_email, data_cadastro)',
+        # Listagens e buscas do CLI (ORDER BY nome)
+        'CREATE INDEX IF NOT EXISTS idx_produtos_usuario_nome ON produtos (usuario_email, nome)',
+        'CREATE INDEX IF NOT EXISTS idx_clientes_usuario_nome ON clientes (usuario_email, nome)',
+        # listar_vendas / relatorio_vendas
+        'CREATE INDEX IF NOT EXISTS idx_vendas_usuario_data ON vendas (usuario_email, data_venda)',
+        'CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto_id)',
+        'CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON vendas (cliente_id)',
+    ]),
+    (3, 'Contadores do dashboard mantidos por triggers', _stats_table),
+    (4, 'Busca textual FTS5 do catálogo', _catalog_fts),
+    (5, 'Índice da paginação por cursor do catálogo', [
+        # Product.get_page: ORDER BY data_cadastro DESC, id DESC
+        'CREATE INDEX IF NOT EXISTS idx_produtos_data_id ON produtos (data_cadastro, id)',
+    ]),
+    (6, 'Datas normalizadas e coluna vendas.sale_day', _normalized_dates),
+    (7, 'Histórico da manutenção do banco', [
+        '''
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            banco TEXT NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT NOT NULL,          -- running, ok ou error
+            duration_ms REAL,
+            tasks TEXT,                    -- JSON com o resultado de cada banco
+            bytes_reclaimed INTEGER DEFAULT 0,
+            detail TEXT
+        )
+        ''',
+    ]),
+    (8, 'Registro de alterações do catálogo', _catalog_changes),
+    (9, 'Hora das alterações do catálogo', _catalog_changes_time),
+    (10, 'Índices dos filtros e ordenações do catálogo público', [
+        # Product.catalog_filters: categoria com ordenação por data ou preço
+        'CREATE INDEX IF NOT EXISTS idx_produtos_categoria_data ON produtos (categoria, data_cadastro, id)',
+        'CREATE INDEX IF NOT EXISTS idx_produtos_categoria_preco ON produtos (categoria, preco, id)',
+        # Faixa de preço e sort=price_asc/price_desc; sort=name
+        'CREATE INDEX IF NOT EXISTS idx_produtos_preco_id ON produtos (preco, id)',
+        'CREATE INDEX IF NOT EXISTS idx_produtos_nome_id ON produtos (nome, id)',
+    ]),
+    (11, 'Registro central dos shards (faixa de ids de cada um)', [
+        '''
+        CREATE TABLE IF NOT EXISTS shards (
+            numero INTEGER PRIMARY KEY AUTOINCREMENT,  -- ids do shard a partir de numero * SHARD_ID_BLOCK
+            chave TEXT UNIQUE NOT NULL                 -- seller_key (nome do arquivo)
+        )
+        ''',
+    ]),
+    (12, 'Vez do agendador de manutenção entre os processos', [
+        '''
+        CREATE TABLE IF NOT EXISTS maintenance_lease (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            owner TEXT,                          -- processo que roda o agendador
+            expires_at REAL NOT NULL DEFAULT 0,  -- fim da vez (time.time())
+            writes INTEGER NOT NULL DEFAULT 0,   -- escritas somadas de todos os processos
+            writes_at_run INTEGER NOT NULL DEFAULT 0,
+            requested_at TIMESTAMP               -- execução pedida pelo admin, pendente
+        )
+        ''',
+        'INSERT OR IGNORE INTO maintenance_lease (id) VALUES (1)',
+    ]),
+]
+
+
+def get_schema_version(conn):
+    """Retorna a versão de esquema registrada no banco"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """Aplica, em ordem, as migrações ainda não registradas no banco"""
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+
+        # BEGIN IMMEDIATE serializa workers que migram ao mesmo tempo
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration:
+                    conn.execute(statement)
+
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+            applied.append(version)
+            print(f"Migração {version} aplicada: {description}")
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
@@ -0,0 +1,85 @@
+# Perfis de desempenho do SQLite aplicados a cada conexão aberta
+import os
+import sqlite3
+from urllib.parse import quote
+import config
+from src.database.instrumentation import connection_factory
+
+# Todos os perfis usam WAL: leitores não bloqueiam atrás de um escritor
+# (journal_mode é persistente no arquivo, então não deve alternar entre perfis)
+# auto_vacuum só vale para bancos novos: precisa vir antes do journal_mode
+PROFILES = {
+    # Tráfego web: commits curtos e frequentes
+    'oltp': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,           # ~16 MB
+        'mmap_size': 134217728,         # 128 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # Importações em massa: pode perder os últimos commits em queda de energia
+    'bulk_load': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -64000,           # ~64 MB
+        'mmap_size': 268435456,         # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+    # Relatórios: varreduras longas, cache e mmap grandes
+    'readonly_analytics': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -128000,          # ~128 MB
+        'mmap_size': 536870912,         # 512 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+    },
+}
+
+PRAGMA_ORDER = ['busy_timeout', 'auto_vacuum', 'journal_mode', 'synchronous',
+                'cache_size', 'mmap_size', 'temp_store']
+
+
+def resolve_profile(name=None):
+    """Resolve o nome do perfil (argumento > variável DB_PROFILE > config)"""
+    name = name or os.environ.get('DB_PROFILE') or config.DB_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Perfil de banco desconhecido: {name}")
+    return name
+
+
+def apply_profile(conn, name=None):
+    """Aplica os PRAGMAs do perfil na conexão"""
+    name = resolve_profile(name)
+    for pragma in PRAGMA_ORDER:
+        value = PROFILES[name][pragma]
+        # journal_mode é persistente no arquivo: só altera se for diferente
+        if pragma == 'journal_mode':
+            current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            read_only = conn.execute('PRAGMA query_only').fetchone()[0]
+            if current.upper() == value.upper() or read_only:
+                continue
+        # auto_vacuum também é gravado no arquivo (conexões ro não alteram)
+        if pragma == 'auto_vacuum' and conn.execute('PRAGMA query_only').fetchone()[0]:
+            continue
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    return name
+
+
+def connect(database, profile=None, readonly=False, **kwargs):
+    """Abre uma conexão SQLite já configurada com o perfil de desempenho"""
+    kwargs.setdefault('factory', connection_factory())
+    if readonly:
+        # mode=ro não cria o arquivo; query_only bloqueia qualquer escrita
+        database = f'file:{quote(database)}?mode=ro'
+        kwargs['uri'] = True
+    conn = sqlite3.connect(database, **kwargs)
+    if readonly:
+        conn.execute('PRAGMA query_only = 1')
+    apply_profile(conn, profile)
+    return conn
@@ -0,0 +1,315 @@
+# Réplica em memória do catálogo (produtos + users) para as leituras públicas
+# Cada processo copia as duas tabelas para um banco em memória e o mantém
+# atualizado a partir de catalog_changes; as leituras do catálogo não tocam o
+# disco nem disputam locks do arquivo. As leituras usam uma única conexão em
+# memória, uma de cada vez (ver CatalogReplica.reader).
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+import config
+from src.database import profiles
+from src.database.connection import get_db_connection, release_db_connection
+from src.database.instrumentation import connection_factory
+
+REPLICATED_TABLES = {'produtos': 'id', 'users': 'email'}
+# Colunas copiadas quando a tabela não vai inteira: do vendedor o catálogo só
+# precisa do nome, e a senha (hash) nunca entra na memória dos workers
+REPLICATED_COLUMNS = {'users': ('email', 'name')}
+# Limite de parâmetros por IN (...) nas leituras incrementais
+_IN_CHUNK = 500
+
+
+def read_catalog_version(conn):
+    """(seq, changed_at) da última alteração registrada em catalog_changes"""
+    row = conn.execute('''
+        SELECT seq, changed_at FROM catalog_changes ORDER BY seq DESC LIMIT 1
+    ''').fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def _columns(table):
+    """Lista de colunas replicadas da tabela ('*' se todas)"""
+    return ', '.join(REPLICATED_COLUMNS.get(table, ('*',)))
+
+
+def _chunks(values, size=_IN_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class CatalogReplica:
+    """Cópia em memória do catálogo, atualizada por uma thread do processo"""
+
+    def __init__(self, database, refresh_interval=0.2):
+        self.database = database
+        self.refresh_interval = refresh_interval
+        self._memory = None
+        self._source = None
+        self._data_version = None
+        # (seq, changed_at) da última alteração aplicada; trocado de uma vez
+        self._version = (0, None)
+        # _lock protege a conexão em memória; _refresh_lock serializa as atualizações
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'full_loads': 0, 'refreshes': 0, 'rows_applied': 0,
+                       'reads': 0, 'errors': 0, 'last_refresh_at': None}
+
+    def start(self):
+        """Carrega a cópia e inicia a thread de atualização"""
+        self._source = profiles.connect(
+            self.database, readonly=True, check_same_thread=False)
+        self.load()
+        self._thread = threading.Thread(
+            target=self._run, name='catalog-replica', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def load(self):
+        """Cópia completa de produtos e users para um novo banco em memória
+
+        Anexa o arquivo somente leitura e copia só as tabelas do catálogo (com
+        os índices) em uma transação, um único snapshot. A nova conexão é
+        montada fora de _lock e trocada de uma vez; as leituras seguem na
+        cópia anterior enquanto isso.
+        """
+        with self._refresh_lock:
+            data_version = self._source.execute('PRAGMA data_version').fetchone()[0]
+            memory = sqlite3.connect(
+                ':memory:', check_same_thread=False, uri=True, factory=connection_factory())
+            try:
+                memory.execute('ATTACH DATABASE ? AS origem',
+                               (f'file:{quote(self.database)}?mode=ro',))
+                memory.execute('BEGIN')
+                # Só as tabelas e índices; triggers de stats/FTS não se aplicam
+                # à cópia, que só recebe linhas prontas. Tabelas copiadas em
+                # parte são criadas só com as colunas listadas
+                whole = [table for table in REPLICATED_TABLES
+                         if table not in REPLICATED_COLUMNS]
+                schema = memory.execute(f'''
+                    SELECT type, sql FROM origem.sqlite_master
+                    WHERE tbl_name IN ({', '.join('?' * len(whole))})
+                      AND type IN ('table', 'index') AND sql IS NOT NULL
+                ''', whole).fetchall()
+                for kind, sql in schema:
+                    if kind == 'table':
+                        memory.execute(sql)
+                for table, columns in REPLICATED_COLUMNS.items():
+                    memory.execute(f'''
+                        CREATE TABLE main.{table} AS
+                        SELECT {', '.join(columns)} FROM origem.{table} WHERE 0
+                    ''')
+                    key = REPLICATED_TABLES[table]
+                    memory.execute(
+                        f'CREATE UNIQUE INDEX main.idx_{table}_{key} ON {table} ({key})')
+                for table in REPLICATED_TABLES:
+                    # A cópia tem exatamente as colunas selecionadas, na mesma ordem
+                    memory.execute(f'''
+                        INSERT INTO main.{table}
+                        SELECT {_columns(table)} FROM origem.{table}
+                    ''')
+                # catalog_changes só existe no banco anexado
+                version = read_catalog_version(memory)
+                for kind, sql in schema:
+                    if kind == 'index':
+                        memory.execute(sql)
+                memory.commit()
+                memory.execute('DETACH DATABASE origem')
+            except Exception:
+                memory.close()
+                raise
+            memory.execute('PRAGMA query_only = 1')
+            memory.row_factory = sqlite3.Row
+
+            with self._lock:
+                previous, self._memory = self._memory, memory
+            if previous is not None:
+                previous.close()
+            self._data_version = data_version
+            self._version = version
+            self._stats['full_loads'] += 1
+            self._stats['last_refresh_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _read_changes(self):
+        """Linhas alteradas desde o último seq, lidas em um único snapshot
+
+        Retorna ((seq, changed_at), {tabela: (chaves, colunas, linhas)}) ou
+        None se o registro já foi podado além do ponto da réplica.
+        """
+        source = self._source
+        last_seq = self._version[0]
+        source.execute('BEGIN')
+        try:
+            changes = source.execute('''
+                SELECT seq, tabela, chave, changed_at FROM catalog_changes
+                WHERE seq > ? ORDER BY seq
+            ''', (last_seq,)).fetchall()
+            if not changes:
+                return self._version, {}
+            if changes[0][0] != last_seq + 1:
+                return None
+
+            result = {}
+            for table, key in REPLICATED_TABLES.items():
+                keys = {chave for _, tabela, chave, _ in changes if tabela == table}
+                if not keys:
+                    continue
+                columns, rows = None, []
+                for chunk in _chunks(keys):
+                    cursor = source.execute(f'''
+                        SELECT {_columns(table)} FROM {table}
+                        WHERE {key} IN ({', '.join('?' * len(chunk))})
+                    ''', chunk)
+                    columns = [column[0] for column in cursor.description]
+                    rows.extend(cursor.fetchall())
+                result[table] = (keys, columns, rows)
+            return (changes[-1][0], changes[-1][3]), result
+        finally:
+            source.rollback()
+
+    def refresh(self):
+        """Aplica as alterações do banco desde a última atualização
+
+        PRAGMA data_version só muda após commits de outras conexões, então a
+        verificação sem alterações é uma consulta barata.
+        """
+        with self._refresh_lock:
+            data_version = self._source.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return 0
+            changes = self._read_changes()
+            if changes is None:
+                self.load()
+                return 0
+
+            # Só a aplicação em memória bloqueia as leituras
+            version, tables = changes
+            applied = 0
+            with self._lock:
+                memory = self._memory
+                memory.execute('PRAGMA query_only = 0')
+                try:
+                    for table, (keys, columns, rows) in tables.items():
+                        key = REPLICATED_TABLES[table]
+                        for chunk in _chunks(keys):
+                            memory.execute(f'''
+                                DELETE FROM {table}
+                                WHERE {key} IN ({', '.join('?' * len(chunk))})
+                            ''', chunk)
+                        if rows:
+                            memory.executemany(f'''
+                                INSERT INTO {table} ({', '.join(columns)})
+                                VALUES ({', '.join('?' * len(columns))})
+                            ''', rows)
+                        applied += len(rows)
+                    memory.commit()
+                except Exception:
+                    memory.rollback()
+                    raise
+                finally:
+                    memory.execute('PRAGMA query_only = 1')
+            self._data_version = data_version
+            self._version = version
+            self._stats['refreshes'] += 1
+            self._stats['rows_applied'] += applied
+            self._stats['last_refresh_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        return applied
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._stats['errors'] += 1
+                print(f"Erro ao atualizar a réplica do catálogo: {e}")
+
+    def version(self):
+        """(seq, changed_at) dos dados servidos pela réplica"""
+        return self._version
+
+    @contextmanager
+    def reader(self):
+        """Conexão em memória para consultas (exclusiva enquanto aberta)
+
+        As leituras do processo são serializadas nesta conexão, e a aplicação
+        de alterações (refresh) espera a leitura em curso. As consultas do
+        catálogo são curtas e paginadas; uma recarga completa não bloqueia,
+        pois só a troca de conexão passa por _lock.
+        """
+        with self._lock:
+            self._stats['reads'] += 1
+            yield self._memory
+
+    def stats(self):
+        """Contadores da réplica deste processo"""
+        data = dict(self._stats)
+        data.update({
+            'last_seq': self._version[0],
+            'running': self._thread is not None and self._thread.is_alive(),
+        })
+        return data
+
+
+_replica = None
+_replica_pid = None
+_replica_lock = threading.Lock()
+
+
+def get_catalog_replica():
+    """Réplica do processo atual, criada na primeira chamada; None se desativada
+
+    O modo particionado não é suportado: a réplica copia só o banco
+    principal, e os produtos ficam nos shards.
+    """
+    global _replica, _replica_pid
+    if not config.CATALOG_REPLICA_ENABLED or config.SHARDING_ENABLED:
+        return None
+    # Cada worker do gunicorn mantém a sua própria cópia
+    if _replica_pid != os.getpid():
+        with _replica_lock:
+            if _replica_pid != os.getpid():
+                replica = CatalogReplica(
+                    config.DATABASE_NAME, config.CATALOG_REPLICA_REFRESH_MS / 1000)
+                try:
+                    replica.start()
+                except Exception as e:
+                    print(f"Erro ao carregar a réplica do catálogo: {e}")
+                    replica = None
+                _replica, _replica_pid = replica, os.getpid()
+    return _replica
+
+
+def notify_catalog_write():
+    """Atualiza a réplica após uma escrita deste processo (lê o que escreveu)"""
+    replica = get_catalog_replica()
+    if replica is None:
+        return
+    try:
+        replica.refresh()
+    except Exception as e:
+        print(f"Erro ao atualizar a réplica do catálogo: {e}")
+
+
+@contextmanager
+def catalog_connection(search=False):
+    """Conexão para ler o catálogo: a réplica em memória ou o pool de leitura
+
+    search=True: a consulta usa produtos_fts, que a réplica não copia.
+    """
+    replica = None if search else get_catalog_replica()
+    if replica is not None:
+        with replica.reader() as conn:
+            yield conn
+        return
+    conn = get_db_connection(readonly=True)
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
@@ -0,0 +1,307 @@
+# Armazenamento particionado por vendedor: um arquivo SQLite por usuario_email
+# Tabelas por vendedor (produtos, clientes, vendas) ficam no shard do vendedor;
+# a tabela users continua no banco principal.
+import glob
+import hashlib
+import os
+import threading
+import config
+from src.database import profiles
+from src.database.connection import (ConnectionPool, get_db_connection,
+                                     release_db_connection)
+from src.database.migrations import apply_migrations
+from src.database.write_queue import WriteQueue, get_write_queue
+
+# Faixa de ids de cada shard: produtos, clientes e vendas do shard n recebem
+# ids a partir de n * SHARD_ID_BLOCK, únicos entre todos os shards (e exatos
+# em um Number do JavaScript para até ~2 milhões de shards)
+SHARD_ID_BLOCK = 2 ** 32
+_ID_TABLES = ('produtos', 'clientes', 'vendas')
+_ID_COLUMNS = ('id', 'produto_id', 'cliente_id')
+
+
+def seller_key(usuario_email):
+    """Chave estável de um vendedor para nomes de arquivo"""
+    return hashlib.sha1(usuario_email.strip().lower().encode()).hexdigest()[:16]
+
+
+def shard_path(usuario_email):
+    """Caminho do arquivo do shard de um vendedor"""
+    return os.path.join(config.SHARD_DIR, f'{seller_key(usuario_email)}.db')
+
+
+def _register_shard(key):
+    """Número do shard na sequência central (tabela shards do banco principal)"""
+    main = profiles.connect(config.DATABASE_NAME)
+    try:
+        apply_migrations(main)
+        main.execute('BEGIN IMMEDIATE')
+        try:
+            main.execute('INSERT OR IGNORE INTO shards (chave) VALUES (?)', (key,))
+            numero = main.execute(
+                'SELECT numero FROM shards WHERE chave = ?', (key,)).fetchone()[0]
+            main.commit()
+        except Exception:
+            main.rollback()
+            raise
+        return numero
+    finally:
+        main.close()
+
+
+def _seller_name(usuario_email):
+    """Nome do vendedor na tabela users do banco principal"""
+    main = profiles.connect(config.DATABASE_NAME)
+    try:
+        row = main.execute('SELECT name FROM users WHERE email = ?',
+                           (usuario_email,)).fetchone()
+        return row[0] if row else None
+    finally:
+        main.close()
+
+
+class Shard:
+    """Pools de leitura/escrita e fila de escrita de um arquivo de shard"""
+
+    def __init__(self, path, usuario_email=None):
+        self.path = path
+        self.key = os.path.splitext(os.path.basename(path))[0]
+        self.number = _register_shard(self.key)
+        self._ensure_schema(usuario_email)
+        profile = profiles.resolve_profile()
+        self.read_pool = ConnectionPool(
+            path, config.DB_POOL_SIZE, config.DB_POOL_TIMEOUT, profile, readonly=True)
+        self.write_pool = ConnectionPool(
+            path, 1, config.DB_POOL_TIMEOUT, profile)
+        self.write_queue = WriteQueue(
+            config.WRITE_QUEUE_MAX_BATCH, config.WRITE_QUEUE_MAX_DELAY_MS / 1000,
+            pool_getter=lambda: self.write_pool)
+
+    def _ensure_schema(self, usuario_email=None):
+        """Cria o arquivo do shard, aplica as migrações e reserva a faixa de ids"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = profiles.connect(self.path)
+        try:
+            apply_migrations(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.seller = self._sync_seller(conn, usuario_email)
+                self._reserve_ids(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+
+    def _sync_seller(self, conn, usuario_email=None):
+        """Copia o vendedor do banco principal para a tabela users do shard
+
+        Os triggers do produtos_fts leem o nome do vendedor da tabela users do
+        próprio banco; sem essa cópia a busca por vendedor não acha nada no
+        modo particionado. O nome é conferido a cada abertura do shard.
+        Retorna o email do vendedor (None se ainda não for conhecido).
+        """
+        if usuario_email is None:
+            row = conn.execute('SELECT usuario_email FROM produtos LIMIT 1').fetchone()
+            if row is None:
+                return None
+            usuario_email = row[0]
+        name = _seller_name(usuario_email)
+        if name is None:
+            return None
+
+        row = conn.execute('SELECT name FROM users WHERE email = ?',
+                           (usuario_email,)).fetchone()
+        if row is None:
+            # A senha fica só no banco principal
+            conn.execute("INSERT INTO users (name, email, password) VALUES (?, ?, '')",
+                         (name, usuario_email))
+            conn.execute('''
+                UPDATE produtos_fts SET vendedor_nome = ?
+                WHERE rowid IN (SELECT id FROM produtos WHERE usuario_email = ?)
+            ''', (name, usuario_email))
+        elif row[0] != name:
+            # trg_users_fts_update atualiza o índice
+            conn.execute('UPDATE users SET name = ? WHERE email = ?', (name, usuario_email))
+        return usuario_email
+
+    def _reserve_ids(self, conn):
+        """Faz os ids do shard começarem em number * SHARD_ID_BLOCK
+
+        Shards criados antes da faixa de ids têm as linhas deslocadas (com as
+        referências em vendas), inclusive nos meses arquivados, e o índice
+        FTS5 refeito, pois o rowid dele é o id do produto. A exportação
+        analítica do shard é descartada para ser refeita com os ids novos.
+        """
+        base = self.number * SHARD_ID_BLOCK
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'produtos'").fetchone()
+        if row is not None and row[0] >= base:
+            return
+        # Importados aqui: archive e parquet_export importam este módulo
+        from src.analytics.parquet_export import forget_database
+        from src.database.archive import shift_archived_ids
+
+        # Arquivos mensais primeiro: se a troca abaixo falhar, a próxima
+        # abertura repete tudo e os meses já deslocados não mudam
+        shifted = shift_archived_ids(self.path, base)
+        for table in _ID_TABLES:
+            shifted += conn.execute(f'UPDATE {table} SET id = id + ? WHERE id < ?',
+                                    (base, base)).rowcount
+        for column in _ID_COLUMNS[1:]:
+            conn.execute(f'UPDATE vendas SET {column} = {column} + ? WHERE {column} < ?',
+                         (base, base))
+        # AUTOINCREMENT continua do maior valor em sqlite_sequence
+        for table in _ID_TABLES:
+            updated = conn.execute(
+                'UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?',
+                (base, table)).rowcount
+            if not updated:
+                conn.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)',
+                             (table, base))
+
+        if not shifted:
+            return
+        conn.execute('DELETE FROM produtos_fts')
+        conn.execute('''
+            INSERT INTO produtos_fts (rowid, nome, categoria, vendedor_nome)
+            SELECT p.id, p.nome, p.categoria, u.name
+            FROM produtos p
+            LEFT JOIN users u ON p.usuario_email = u.email
+        ''')
+        forget_database(self.path)
+
+    def pool_for(self, conn):
+        """Retorna o pool dono da conexão (ou None)"""
+        for pool in (self.read_pool, self.write_pool):
+            if pool.owns(conn):
+                return pool
+        return None
+
+
+_shards = {}
+_shards_pid = None
+_shards_lock = threading.Lock()
+
+
+def get_shard(usuario_email=None, path=None):
+    """Retorna (criando sob demanda) o shard de um vendedor ou de um arquivo"""
+    global _shards, _shards_pid
+    path = path or shard_path(usuario_email)
+    with _shards_lock:
+        if _shards_pid != os.getpid():
+            _shards = {}
+            _shards_pid = os.getpid()
+        shard = _shards.get(path)
+        if shard is None:
+            shard = _shards[path] = Shard(path, usuario_email)
+        elif usuario_email and shard.seller is None:
+            # Aberto antes pelo caminho, sem produtos para identificar o vendedor
+            shard._ensure_schema(usuario_email)
+        return shard
+
+
+def list_shard_paths():
+    """Arquivos de shard existentes"""
+    return sorted(glob.glob(os.path.join(config.SHARD_DIR, '*.db')))
+
+
+def get_tenant_connection(usuario_email, readonly=False):
+    """Conexão para as tabelas do vendedor (shard ou banco principal)"""
+    if not config.SHARDING_ENABLED:
+        return get_db_connection(readonly)
+    try:
+        shard = get_shard(usuario_email)
+        return (shard.read_pool if readonly else shard.write_pool).acquire()
+    except Exception as e:
+        print(f"Erro ao conectar com shard: {e}")
+        return None
+
+
+def release_tenant_connection(conn):
+    """Devolve uma conexão obtida com get_tenant_connection"""
+    if conn is None:
+        return
+    if config.SHARDING_ENABLED:
+        with _shards_lock:
+            shards = list(_shards.values())
+        for shard in shards:
+            pool = shard.pool_for(conn)
+            if pool is not None:
+                pool.release(conn)
+                return
+    release_db_connection(conn)
+
+
+def get_tenant_write_queue(usuario_email):
+    """Fila de escrita do shard do vendedor (ou a fila principal)"""
+    if not config.SHARDING_ENABLED:
+        return get_write_queue()
+    return get_shard(usuario_email).write_queue
+
+
+def iter_tenant_read_connections():
+    """Gera conexões de leitura de todos os bancos com dados de vendedores
+
+    Usado nas leituras de catálogo que cruzam todos os vendedores.
+    """
+    if not config.SHARDING_ENABLED:
+        conn = get_db_connection(readonly=True)
+        try:
+            yield conn
+        finally:
+            release_db_connection(conn)
+        return
+
+    for path in list_shard_paths():
+        shard = get_shard(path=path)
+        conn = shard.read_pool.acquire()
+        try:
+            yield conn
+        finally:
+            shard.read_pool.release(conn)
+
+
+def connect_shard(usuario_email, profile=None):
+    """Conexão avulsa (sem pool) ao shard do vendedor, usada pelo CLI"""
+    path = get_shard(usuario_email).path
+    return profiles.connect(path, profile)
+
+
+def migrate_to_shards(database=None):
+    """Copia produtos, clientes e vendas do banco principal para os shards"""
+    database = database or config.DATABASE_NAME
+    main = profiles.connect(database)
+    try:
+        emails = [row[0] for row in main.execute('''
+            SELECT usuario_email FROM produtos
+            UNION SELECT usuario_email FROM clientes
+            UNION SELECT usuario_email FROM vendas
+        ''').fetchall()]
+
+        for email in emails:
+            shard = get_shard(email)
+            base = shard.number * SHARD_ID_BLOCK
+            main.execute('ATTACH DATABASE ? AS shard', (shard.path,))
+            try:
+                for table in _ID_TABLES:
+                    columns = [row[1] for row in main.execute(f'PRAGMA shard.table_info({table})')]
+                    # ids (e referências) entram na faixa do shard
+                    values = ', '.join(
+                        f'{column} + {base}' if column in _ID_COLUMNS else column
+                        for column in columns)
+                    main.execute(f'''
+                        INSERT OR IGNORE INTO shard.{table} ({', '.join(columns)})
+                        SELECT {values} FROM main.{table} WHERE usuario_email = ?
+                    ''', (email,))
+                main.commit()
+            finally:
+                main.execute('DETACH DATABASE shard')
+            print(f"Shard de {email}: {shard.path}")
+    finally:
+        main.close()
+
+
+if __name__ == '__main__':
+    migrate_to_shards()
@@ -0,0 +1,140 @@
+# Fila de escrita com commit agrupado (group commit)
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import config
+from src.database.connection import get_pool
+
+
+class WriteQueue:
+    """Fila com uma única thread escritora que agrupa várias escritas por commit
+
+    Cada operação é uma função que recebe a conexão de escrita; o chamador
+    recebe um Future resolvido com o retorno da função somente após o commit
+    do lote em que ela entrou.
+    """
+
+    def __init__(self, max_batch=100, max_delay=0.005, pool_getter=get_pool):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pool_getter = pool_getter
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'batches': 0,
+                       'committed': 0, 'failed': 0, 'largest_batch': 0}
+
+    def _ensure_worker(self):
+        """Inicia a thread escritora (uma por processo)"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, name='write-queue', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, operation):
+        """Enfileira operation(conn) e retorna um Future com o resultado"""
+        future = Future()
+        with self._lock:
+            self._stats['submitted'] += 1
+        if not config.WRITE_QUEUE_ENABLED:
+            # Sem fila: transação própria, executada na thread do chamador
+            self._commit_batch([(future, operation)])
+            return future
+        self._ensure_worker()
+        self._queue.put((future, operation))
+        return future
+
+    def submit_insert(self, sql, parameters=()):
+        """Enfileira um INSERT; o Future resolve com o lastrowid"""
+        return self.submit(lambda conn: conn.execute(sql, parameters).lastrowid)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        """Executa o lote em uma transação; cada item isolado por SAVEPOINT"""
+        outcomes = []
+        pool = self._pool_getter()
+        try:
+            conn = pool.acquire()
+        except Exception as e:
+            for future, _ in batch:
+                future.set_exception(e)
+            return
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for future, operation in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT item')
+                try:
+                    result = operation(conn)
+                    conn.execute('RELEASE item')
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO item')
+                    conn.execute('RELEASE item')
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            return
+        finally:
+            pool.release(conn)
+
+        committed = sum(1 for _, _, error in outcomes if error is None)
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['largest_batch'] = max(
+                self._stats['largest_batch'], len(batch))
+            self._stats['committed'] += committed
+            self._stats['failed'] += len(outcomes) - committed
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def stats(self):
+        """Estatísticas da fila (lotes, maior lote, itens pendentes)"""
+        with self._lock:
+            data = dict(self._stats)
+        data['pending'] = self._queue.qsize()
+        return data
+
+
+_write_queue = WriteQueue(
+    config.WRITE_QUEUE_MAX_BATCH, config.WRITE_QUEUE_MAX_DELAY_MS / 1000)
+
+
+def get_write_queue():
+    """Retorna a fila de escrita compartilhada do processo"""
+    return _write_queue
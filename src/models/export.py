@@ -0,0 +1,84 @@
+import config
+from src.database.archive import iter_vendas_tables
+from src.database.sharding import get_tenant_connection, release_tenant_connection
+
+
+class Export:
+    """Linhas das exportações de um vendedor, lidas direto do cursor"""
+
+    PRODUCT_COLUMNS = ('id', 'nome', 'preco', 'quantidade', 'categoria',
+                       'data_cadastro', 'image_path')
+    CLIENT_COLUMNS = ('id', 'nome', 'email', 'telefone', 'endereco', 'data_cadastro')
+    SALE_COLUMNS = ('id', 'data_venda', 'cliente_id', 'cliente', 'produto_id', 'produto',
+                    'quantidade', 'preco_unitario', 'total')
+
+    @staticmethod
+    def _connection(usuario_email):
+        conn = get_tenant_connection(usuario_email, readonly=True)
+        if not conn:
+            raise ConnectionError('Banco de dados indisponível')
+        return conn
+
+    @staticmethod
+    def _fetch(cursor):
+        """Linhas do cursor em blocos de EXPORT_FETCH_ROWS (sem lista intermediária)"""
+        try:
+            while True:
+                rows = cursor.fetchmany(config.EXPORT_FETCH_ROWS)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def products(usuario_email):
+        """Produtos do vendedor em ordem de cadastro (índice usuario_email, data_cadastro)"""
+        conn = Export._connection(usuario_email)
+        try:
+            yield from Export._fetch(conn.execute('''
+                SELECT id, nome, preco, quantidade, categoria, data_cadastro, image_path
+                FROM produtos
+                WHERE usuario_email = ?
+                ORDER BY data_cadastro, id
+            ''', (usuario_email,)))
+        finally:
+            release_tenant_connection(conn)
+
+    @staticmethod
+    def clients(usuario_email):
+        """Clientes do vendedor em ordem alfabética (índice usuario_email, nome)"""
+        conn = Export._connection(usuario_email)
+        try:
+            yield from Export._fetch(conn.execute('''
+                SELECT id, nome, email, telefone, endereco, data_cadastro
+                FROM clientes
+                WHERE usuario_email = ?
+                ORDER BY nome, id
+            ''', (usuario_email,)))
+        finally:
+            release_tenant_connection(conn)
+
+    @staticmethod
+    def sales(usuario_email, desde=None):
+        """Vendas do vendedor desde a data (ou todas), incluindo os meses arquivados
+
+        Os meses arquivados saem primeiro, um arquivo por vez, e depois a
+        tabela quente; dentro de cada um a ordem é data_venda, id.
+        """
+        conn = Export._connection(usuario_email)
+        tables = iter_vendas_tables(conn, desde)
+        try:
+            for table in tables:
+                yield from Export._fetch(conn.execute(f'''
+                    SELECT v.id, v.data_venda, v.cliente_id, c.nome, v.produto_id, p.nome,
+                           v.quantidade, v.preco_unitario, v.total
+                    FROM {table} v
+                    LEFT JOIN main.clientes c ON c.id = v.cliente_id
+                    LEFT JOIN main.produtos p ON p.id = v.produto_id
+                    WHERE v.usuario_email = ? {'AND v.sale_day >= ?' if desde else ''}
+                    ORDER BY v.data_venda, v.id
+                ''', (usuario_email, desde) if desde else (usuario_email,)))
+        finally:
+            tables.close()
+            release_tenant_connection(conn)
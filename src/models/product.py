@@ -1,7 +1,49 @@
-from datetime import datetime
-from src.database.connection import get_db_connection
+import base64
+import hashlib
+import heapq
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from flask import g, has_app_context
+import config
+from src.database.connection import get_db_connection, release_db_connection
+from src.database.replica import (catalog_connection, get_catalog_replica,
+                                  notify_catalog_write, read_catalog_version)
+from src.database.sharding import (get_tenant_connection, release_tenant_connection,
+                                   get_tenant_write_queue, iter_tenant_read_connections)
+from src.utils.cache import LRUCache
+from src.utils.compression import EncodedBody
+from src.utils.shared_cache import SharedCache
+from src.utils.single_flight import single_flight
 from src.utils.file_utils import save_image, delete_image
 
+# Listagens do catálogo público: ('all',), ('page', cursor, limit, filtros),
+# ('categories',) e os corpos prontos da API ('page_body', ...), ('categories_body',),
+# cada chave seguida da versão do catálogo
+catalog_cache = LRUCache(config.CATALOG_CACHE_MAX_BYTES, config.CATALOG_CACHE_TTL_S)
+# Segundo nível, comum a todos os workers; a geração é a versão do catálogo
+shared_catalog_cache = SharedCache(
+    config.SHARED_CACHE_PATH, config.SHARED_CACHE_MAX_BYTES, config.SHARED_CACHE_TTL_S,
+    config.SHARED_CACHE_LOCK_TIMEOUT_S)
+
+
+# Ordenações do catálogo público: nome -> (coluna, posição na linha, decrescente)
+# O id desempata na mesma direção, o que permite paginar por cursor
+CATALOG_SORTS = {
+    'recent': ('data_cadastro', 6, True),
+    'price_asc': ('preco', 2, False),
+    'price_desc': ('preco', 2, True),
+    'name': ('nome', 1, False),
+}
+
+
+def _catalog_scope():
+    """Versão do catálogo na chave do single-flight"""
+    return Product.catalog_version()[0]
+
 
 class Product:
     def __init__(self, id=None, nome=None, preco=None, quantidade=None, categoria=None,
@@ -17,36 +59,84 @@ class Product:
 
     @staticmethod
     def create(nome, preco, quantidade, categoria, usuario_email, image_file=None):
-        """Cria um novo produto"""
-        conn = get_db_connection()
-        if not conn:
-            return None
-
+        """Cria um novo produto (commit agrupado pela fila de escrita)"""
+        image_path = None
         try:
             # Salvar imagem se fornecida
-            image_path = None
             if image_file:
                 image_path = save_image(image_file)
                 if not image_path:
                     return None
 
-            cursor = conn.execute('''
-                INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email, image_path, data_cadastro)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (nome, preco, quantidade, categoria, usuario_email, image_path, datetime.now()))
-
-            conn.commit()
-            return cursor.lastrowid
+            # data_cadastro usa o DEFAULT CURRENT_TIMESTAMP (UTC), como no CLI
+            future = get_tenant_write_queue(usuario_email).submit_insert('''
+                INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email, image_path)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (nome, preco, quantidade, categoria, usuario_email, image_path))
+            product_id = future.result()
+            notify_catalog_write()
+            Product.invalidate_catalog()
+            return product_id
         except Exception as e:
             print(f"Erro ao criar produto: {e}")
+            delete_image(image_path)
             return None
-        finally:
-            conn.close()
+
+    @staticmethod
+    def create_bulk(products, usuario_email):
+        """Cria vários produtos do mesmo vendedor em uma única transação
+
+        products: dicts já validados com nome, preco, quantidade, categoria e
+        image (arquivo opcional). As imagens são gravadas em paralelo e as
+        linhas inseridas com um executemany. Retorna uma lista alinhada com
+        products de (id, None) ou (None, mensagem de erro).
+        """
+        results = [None] * len(products)
+        image_paths = [None] * len(products)
+
+        with ThreadPoolExecutor(max_workers=config.BULK_IMAGE_WORKERS) as executor:
+            saved = executor.map(
+                lambda product: save_image(product['image']) if product.get('image') else None,
+                products)
+            for index, (product, image_path) in enumerate(zip(products, saved)):
+                if product.get('image') and not image_path:
+                    results[index] = (None, 'Imagem inválida!')
+                image_paths[index] = image_path
+
+        pending = [index for index, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        rows = [(products[i]['nome'], products[i]['preco'], products[i]['quantidade'],
+                 products[i]['categoria'], usuario_email, image_paths[i]) for i in pending]
+
+        def insert(conn):
+            conn.executemany('''
+                INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email, image_path)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            # Único escritor e AUTOINCREMENT: os ids do lote são consecutivos
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            return range(last_id - len(rows) + 1, last_id + 1)
+
+        try:
+            ids = get_tenant_write_queue(usuario_email).submit(insert).result()
+        except Exception as e:
+            print(f"Erro ao criar produtos em lote: {e}")
+            for index in pending:
+                delete_image(image_paths[index])
+                results[index] = (None, 'Erro ao gravar o produto!')
+            return results
+
+        for index, product_id in zip(pending, ids):
+            results[index] = (product_id, None)
+        notify_catalog_write()
+        Product.invalidate_catalog()
+        return results
 
     @staticmethod
     def get_by_user(usuario_email):
         """Busca produtos de um usuário específico"""
-        conn = get_db_connection()
+        conn = get_tenant_connection(usuario_email, readonly=True)
         if not conn:
             return []
 
@@ -75,70 +165,470 @@ class Product:
             print(f"Erro ao buscar produtos: {e}")
             return []
         finally:
-            conn.close()
+            release_tenant_connection(conn)
 
     @staticmethod
+    def encode_cursor(data_cadastro, product_id):
+        """Gera o token opaco que aponta para depois de (data_cadastro, id)"""
+        raw = json.dumps([data_cadastro, product_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Lê o token de paginação; ValueError se for inválido
+
+        O primeiro valor é o da coluna de ordenação (data, nome ou preço).
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, product_id = json.loads(raw)
+        except Exception:
+            raise ValueError('Cursor inválido')
+        if (not isinstance(value, (str, int, float)) or isinstance(value, bool)
+                or not isinstance(product_id, int)):
+            raise ValueError('Cursor inválido')
+        return value, product_id
+
+    @staticmethod
+    def _keyset(cursor, alias='', column='data_cadastro', descending=True):
+        """Filtro WHERE da página seguinte ao cursor (ordem column, id)"""
+        if not cursor:
+            return '', ()
+        return (f'({alias}{column}, {alias}id) {"<" if descending else ">"} (?, ?)',
+                Product.decode_cursor(cursor))
+
+    @staticmethod
+    def catalog_filters(args):
+        """Filtros do catálogo público lidos da query string; ValueError se inválidos
+
+        categoria, q (busca FTS5), seller (e-mail do vendedor), min_price,
+        max_price, in_stock e sort (ver CATALOG_SORTS). Retorna uma tupla
+        ordenada de pares, usada também nas chaves de cache.
+        """
+        filters = {}
+        for name in ('categoria', 'seller'):
+            value = args.get(name, '').strip()
+            if value:
+                filters[name] = value
+        termo = args.get('q', '').strip()
+        if Product._fts_query(termo):
+            filters['q'] = termo
+        for name in ('min_price', 'max_price'):
+            value = args.get(name, '').strip()
+            if value:
+                price = float(value)
+                if not math.isfinite(price):
+                    raise ValueError('Preço inválido')
+                filters[name] = price
+        if args.get('in_stock', '').strip().lower() in ('1', 'true', 'sim'):
+            filters['in_stock'] = True
+        sort = args.get('sort', '').strip() or 'recent'
+        if sort not in CATALOG_SORTS:
+            raise ValueError('Ordenação inválida')
+        if sort != 'recent':
+            filters['sort'] = sort
+        return tuple(sorted(filters.items()))
+
+    @staticmethod
+    def _filter_sql(filters, alias=''):
+        """Condições WHERE e parâmetros dos filtros do catálogo
+
+        Índices da migração 10: (categoria, data_cadastro, id),
+        (categoria, preco, id), (preco, id) e (nome, id).
+        """
+        clauses, params = [], []
+        if 'categoria' in filters:
+            clauses.append(f'{alias}categoria = ?')
+            params.append(filters['categoria'])
+        if 'seller' in filters:
+            clauses.append(f'{alias}usuario_email = ?')
+            params.append(filters['seller'])
+        if 'min_price' in filters:
+            clauses.append(f'{alias}preco >= ?')
+            params.append(filters['min_price'])
+        if 'max_price' in filters:
+            clauses.append(f'{alias}preco <= ?')
+            params.append(filters['max_price'])
+        if filters.get('in_stock'):
+            clauses.append(f'{alias}quantidade > 0')
+        if 'q' in filters:
+            clauses.append(f'{alias}id IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)')
+            params.append(Product._fts_query(filters['q']))
+        return clauses, params
+
+    @staticmethod
+    def _next_cursor(rows, limit, data_index, id_index):
+        """Token da próxima página (None quando não há mais linhas)"""
+        if len(rows) <= limit:
+            return None
+        last = rows[limit - 1]
+        return Product.encode_cursor(last[data_index], last[id_index])
+
+    @staticmethod
+    def get_page_by_user(usuario_email, cursor=None, limit=config.PAGE_SIZE_DEFAULT):
+        """Página de produtos do usuário; retorna (produtos, next_cursor)
+
+        Usa o índice (usuario_email, data_cadastro): o custo não depende
+        da posição da página.
+        """
+        keyset, params = Product._keyset(cursor)
+        conn = get_tenant_connection(usuario_email, readonly=True)
+        if not conn:
+            return [], None
+
+        try:
+            rows = conn.execute(f'''
+                SELECT id, nome, preco, quantidade, categoria, data_cadastro, image_path
+                FROM produtos
+                WHERE usuario_email = ? {'AND ' + keyset if keyset else ''}
+                ORDER BY data_cadastro DESC, id DESC
+                LIMIT ?
+            ''', (usuario_email, *params, limit + 1)).fetchall()
+
+            products = [Product(
+                id=row['id'],
+                nome=row['nome'],
+                preco=row['preco'],
+                quantidade=row['quantidade'],
+                categoria=row['categoria'],
+                data_cadastro=row['data_cadastro'],
+                usuario_email=usuario_email,
+                image_path=row['image_path']
+            ) for row in rows[:limit]]
+            return products, Product._next_cursor(rows, limit, 5, 0)
+        except Exception as e:
+            print(f"Erro ao buscar produtos: {e}")
+            return [], None
+        finally:
+            release_tenant_connection(conn)
+
+    @staticmethod
+    def catalog_version():
+        """Versão do catálogo: (token, data UTC da última alteração)
+
+        Vem do contador de catalog_changes (da réplica em memória, se ativa),
+        lido uma vez por requisição. (None, None) se não puder ser lido.
+        """
+        if has_app_context() and '_catalog_version' in g:
+            return g._catalog_version
+
+        try:
+            replica = get_catalog_replica()
+            if replica is not None:
+                versions = [replica.version()]
+            else:
+                conn = get_db_connection(readonly=True)
+                try:
+                    versions = [read_catalog_version(conn)]
+                finally:
+                    release_db_connection(conn)
+                if config.SHARDING_ENABLED:
+                    versions += [read_catalog_version(shard_conn)
+                                 for shard_conn in iter_tenant_read_connections()]
+
+            seqs = '.'.join(str(seq) for seq, _ in versions)
+            token = seqs if len(versions) == 1 else hashlib.sha1(seqs.encode()).hexdigest()[:16]
+            dates = [changed_at for _, changed_at in versions if changed_at]
+            changed_at = None
+            if dates:
+                changed_at = datetime.strptime(max(dates), '%Y-%m-%d %H:%M:%S').replace(
+                    tzinfo=timezone.utc)
+            version = (token, changed_at)
+        except Exception as e:
+            print(f"Erro ao ler a versão do catálogo: {e}")
+            version = (None, None)
+
+        if has_app_context():
+            g._catalog_version = version
+        return version
+
+    @staticmethod
+    def _discard_version():
+        """Após uma falha de leitura a resposta não deve levar a versão (ETag)"""
+        if has_app_context():
+            g._catalog_version = (None, None)
+
+    @staticmethod
+    def _cached(key, loader):
+        """Resultado do catálogo via catalog_cache (erros não são guardados)
+
+        A versão do catálogo faz parte da chave: escritas de outros processos
+        também tornam as entradas antigas inalcançáveis. Numa falta, o cache
+        compartilhado evita que cada worker refaça a mesma consulta.
+        """
+        if not config.CATALOG_CACHE_ENABLED:
+            return loader()
+        version = Product.catalog_version()[0]
+        if config.SHARED_CACHE_ENABLED and version is not None:
+            local_loader = loader
+
+            def loader():
+                return shared_catalog_cache.get_or_load('catalog', key, version, local_loader)
+        return catalog_cache.get_or_load(key + (version,), loader)
+
+    @staticmethod
+    def invalidate_catalog():
+        """Descarta do cache as entradas de versões anteriores do catálogo
+
+        A versão faz parte de cada chave, então após uma escrita essas
+        entradas já não seriam lidas; removê-las libera o espaço do LRU.
+        """
+        if has_app_context():
+            g.pop('_catalog_version', None)
+        version = Product.catalog_version()[0]
+        catalog_cache.invalidate(lambda key: key[-1] != version)
+
+    @staticmethod
+    @single_flight('produtos.get_page', scope=_catalog_scope)
+    def get_page(cursor=None, limit=config.PAGE_SIZE_DEFAULT, filters=()):
+        """Página do catálogo público; retorna (produtos, next_cursor)
+
+        filters vem de Product.catalog_filters (tupla vazia: catálogo inteiro).
+        """
+        try:
+            return Product._cached(('page', cursor, limit, filters),
+                                   lambda: Product._load_page(cursor, limit, filters))
+        except Exception as e:
+            print(f"Erro ao buscar produtos: {e}")
+            Product._discard_version()
+            return [], None
+
+    @staticmethod
+    @single_flight('produtos.get_page_body', scope=_catalog_scope)
+    def get_page_body(cursor=None, limit=config.PAGE_SIZE_DEFAULT, filters=()):
+        """Resposta de /api/public_products já serializada e comprimida
+
+        O JSON e a compressão são feitos uma vez por versão do catálogo.
+        Retorna um EncodedBody, ou None em caso de erro.
+        """
+        def load():
+            products, next_cursor = Product._load_page(cursor, limit, filters)
+            return EncodedBody({
+                'success': True,
+                'products': products,
+                'next_cursor': next_cursor
+            })
+        try:
+            return Product._cached(('page_body', cursor, limit, filters), load)
+        except Exception as e:
+            print(f"Erro ao buscar produtos: {e}")
+            Product._discard_version()
+            return None
+
+    @staticmethod
+    def _load_page(cursor, limit, filters=()):
+        filters = dict(filters)
+        column, index, descending = CATALOG_SORTS[filters.get('sort', 'recent')]
+        clauses, params = Product._filter_sql(filters, 'p.')
+        keyset, keyset_params = Product._keyset(cursor, 'p.', column, descending)
+        if keyset:
+            clauses.append(keyset)
+            params.extend(keyset_params)
+        where = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+        direction = 'DESC' if descending else 'ASC'
+        order = f'p.{column} {direction}, p.id {direction}'
+        if config.SHARDING_ENABLED:
+            return Product._get_page_sharded(where, params, order, index, descending, limit)
+
+        # Réplica em memória, se ativa (CATALOG_REPLICA_ENABLED); a busca
+        # textual precisa do índice FTS5, que só existe no banco
+        with catalog_connection(search='q' in filters) as conn:
+            rows = conn.execute(f'''
+                SELECT p.id, p.nome, p.preco, p.quantidade, p.categoria, p.image_path,
+                       p.data_cadastro, p.usuario_email, u.name as vendedor_nome
+                FROM produtos p
+                LEFT JOIN users u ON p.usuario_email = u.email
+                {where}
+                ORDER BY {order}
+                LIMIT ?
+            ''', (*params, limit + 1)).fetchall()
+        products = [Product._catalog_dict(row, row[8]) for row in rows[:limit]]
+        return products, Product._next_cursor(rows, limit, index, 0)
+
+    @staticmethod
+    def _get_page_sharded(where, params, order, index, descending, limit):
+        """Mescla o início da página de cada shard (limit + 1 linhas por shard)"""
+        conn = get_db_connection(readonly=True)
+        if not conn:
+            raise ConnectionError('Banco de dados indisponível')
+
+        try:
+            sellers = dict(conn.execute(
+                'SELECT email, name FROM users').fetchall())
+            per_shard = []
+            for shard_conn in iter_tenant_read_connections():
+                per_shard.append(shard_conn.execute(f'''
+                    SELECT p.id, p.nome, p.preco, p.quantidade, p.categoria, p.image_path,
+                           p.data_cadastro, p.usuario_email
+                    FROM produtos p
+                    {where}
+                    ORDER BY {order}
+                    LIMIT ?
+                ''', (*params, limit + 1)).fetchall())
+
+            merged = heapq.merge(
+                *per_shard, key=lambda row: (row[index] if row[index] is not None else '', row[0]),
+                reverse=descending)
+            rows = list(islice(merged, limit + 1))
+            products = [Product._catalog_dict(row, sellers.get(row[7]))
+                        for row in rows[:limit]]
+            return products, Product._next_cursor(rows, limit, index, 0)
+        finally:
+            release_db_connection(conn)
+
+    @staticmethod
+    @single_flight('produtos.get_all', scope=_catalog_scope)
     def get_all():
         """Busca todos os produtos com informações do vendedor"""
-        conn = get_db_connection()
-        if not conn:
+        try:
+            return Product._cached(('all',), Product._load_all)
+        except Exception as e:
+            print(f"Erro ao buscar produtos: {e}")
+            Product._discard_version()
             return []
 
-        try:
+    @staticmethod
+    def _load_all():
+        if config.SHARDING_ENABLED:
+            return Product._get_all_sharded()
+
+        with catalog_connection() as conn:
             cursor = conn.execute('''
-                SELECT p.id, p.nome, p.preco, p.quantidade, p.categoria, p.image_path, 
+                SELECT p.id, p.nome, p.preco, p.quantidade, p.categoria, p.image_path,
                        p.data_cadastro, p.usuario_email, u.name as vendedor_nome
                 FROM produtos p
                 LEFT JOIN users u ON p.usuario_email = u.email
                 ORDER BY p.data_cadastro DESC
             ''')
+            return [Product._catalog_dict(row, row[8]) for row in cursor.fetchall()]
 
-            products = []
-            for row in cursor.fetchall():
-                products.append({
-                    'id': row[0],
-                    'nome': row[1],
-                    'preco': float(row[2]),
-                    'quantidade': row[3],
-                    'categoria': row[4],
-                    'image_path': row[5],
-                    'data_cadastro': row[6],
-                    'usuario_email': row[7],
-                    'vendedor_nome': row[8] or 'Vendedor'
-                })
-            return products
+    @staticmethod
+    def _catalog_dict(row, vendedor_nome):
+        """Converte uma linha do catálogo no formato da API pública"""
+        return {
+            'id': row[0],
+            'nome': row[1],
+            'preco': float(row[2]),
+            'quantidade': row[3],
+            'categoria': row[4],
+            'image_path': row[5],
+            'data_cadastro': row[6],
+            'usuario_email': row[7],
+            'vendedor_nome': vendedor_nome or 'Vendedor'
+        }
+
+    @staticmethod
+    def _get_all_sharded():
+        """Catálogo completo no modo particionado: mescla os shards por data"""
+        conn = get_db_connection(readonly=True)
+        if not conn:
+            raise ConnectionError('Banco de dados indisponível')
+
+        try:
+            sellers = dict(conn.execute(
+                'SELECT email, name FROM users').fetchall())
+
+            per_shard = []
+            for shard_conn in iter_tenant_read_connections():
+                per_shard.append(shard_conn.execute('''
+                    SELECT id, nome, preco, quantidade, categoria, image_path,
+                           data_cadastro, usuario_email
+                    FROM produtos
+                    ORDER BY data_cadastro DESC
+                ''').fetchall())
+
+            merged = heapq.merge(
+                *per_shard, key=lambda row: str(row[6] or ''), reverse=True)
+            return [Product._catalog_dict(row, sellers.get(row[7])) for row in merged]
+        finally:
+            release_db_connection(conn)
+
+    @staticmethod
+    def _fts_query(termo):
+        """Converte o termo digitado em consulta FTS5 (todas as palavras, por prefixo)"""
+        tokens = re.findall(r'\w+', termo)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    @staticmethod
+    def search(termo, limit=20):
+        """Busca textual ranqueada (bm25) por nome, categoria e vendedor"""
+        match = Product._fts_query(termo)
+        if not match:
+            return []
+
+        try:
+            results = []
+            for conn in iter_tenant_read_connections():
+                if not conn:
+                    return []
+                # Pesos do bm25: nome > categoria > vendedor
+                cursor = conn.execute('''
+                    SELECT p.id, p.nome, p.preco, p.quantidade, p.categoria, p.image_path,
+                           p.data_cadastro, p.usuario_email, u.name as vendedor_nome,
+                           bm25(produtos_fts, 10.0, 3.0, 1.0) as rank
+                    FROM produtos_fts
+                    JOIN produtos p ON p.id = produtos_fts.rowid
+                    LEFT JOIN users u ON p.usuario_email = u.email
+                    WHERE produtos_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ''', (match, limit))
+                results.extend(cursor.fetchall())
+
+            # No modo particionado cada shard devolve o seu top-N
+            results.sort(key=lambda row: row['rank'])
+            return [Product._catalog_dict(row, row['vendedor_nome']) for row in results[:limit]]
         except Exception as e:
-            print(f"Erro ao buscar produtos: {e}")
+            print(f"Erro na busca de produtos: {e}")
             return []
-        finally:
-            conn.close()
 
     @staticmethod
+    @single_flight('produtos.get_categories', scope=_catalog_scope)
     def get_categories():
         """Busca todas as categorias únicas"""
-        conn = get_db_connection()
-        if not conn:
+        try:
+            return Product._cached(('categories',), Product._load_categories)
+        except Exception as e:
+            print(f"Erro ao buscar categorias: {e}")
+            Product._discard_version()
             return []
 
+    @staticmethod
+    @single_flight('produtos.get_categories_body', scope=_catalog_scope)
+    def get_categories_body():
+        """Resposta de /api/categories já serializada e comprimida (ou None)"""
         try:
-            cursor = conn.execute('''
-                SELECT DISTINCT categoria 
-                FROM produtos 
-                WHERE categoria IS NOT NULL AND categoria != ''
-                ORDER BY categoria
-            ''')
-
-            return [row[0] for row in cursor.fetchall()]
+            return Product._cached(('categories_body',), lambda: EncodedBody({
+                'success': True,
+                'categories': Product._load_categories()
+            }))
         except Exception as e:
             print(f"Erro ao buscar categorias: {e}")
-            return []
-        finally:
-            conn.close()
+            Product._discard_version()
+            return None
+
+    @staticmethod
+    def _load_categories():
+        sql = '''
+            SELECT DISTINCT categoria
+            FROM produtos
+            WHERE categoria IS NOT NULL AND categoria != ''
+        '''
+        if not config.SHARDING_ENABLED:
+            with catalog_connection() as conn:
+                return sorted(row[0] for row in conn.execute(sql).fetchall())
+
+        categories = set()
+        for conn in iter_tenant_read_connections():
+            if not conn:
+                raise ConnectionError('Banco de dados indisponível')
+            categories.update(row[0] for row in conn.execute(sql).fetchall())
+        return sorted(categories)
 
     @staticmethod
     def delete(product_id, usuario_email):
         """Deleta um produto"""
-        conn = get_db_connection()
+        conn = get_tenant_connection(usuario_email)
         if not conn:
             return False
 
@@ -160,9 +650,11 @@ class Product:
             # Deletar produto
             conn.execute('DELETE FROM produtos WHERE id = ?', (product_id,))
             conn.commit()
+            notify_catalog_write()
+            Product.invalidate_catalog()
             return True
         except Exception as e:
             print(f"Erro ao deletar produto: {e}")
             return False
         finally:
-            conn.close()
+            release_tenant_connection(conn)
@@ -0,0 +1,80 @@
+from src.database.replica import notify_catalog_write
+from src.database.sharding import get_tenant_write_queue
+from src.models.product import Product
+
+
+class SaleError(Exception):
+    """Venda recusada: code é 'invalid', 'not_found' ou 'stock'"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class Sale:
+    def __init__(self, id=None, cliente_id=None, produto_id=None, quantidade=None,
+                 preco_unitario=None, total=None, usuario_email=None):
+        self.id = id
+        self.cliente_id = cliente_id
+        self.produto_id = produto_id
+        self.quantidade = quantidade
+        self.preco_unitario = preco_unitario
+        self.total = total
+        self.usuario_email = usuario_email
+
+    @staticmethod
+    def create(usuario_email, cliente_id, produto_id, quantidade):
+        """Registra a venda e baixa o estoque na mesma transação (BEGIN IMMEDIATE)
+
+        A baixa é condicional no próprio UPDATE (quantidade >= pedido), então
+        vendas simultâneas nunca deixam o estoque negativo e não há leitura
+        prévia do estoque. Retorna a Sale; SaleError se a venda for recusada,
+        None em caso de erro do banco.
+        """
+        if quantidade <= 0:
+            raise SaleError('Quantidade deve ser maior que zero!', 'invalid')
+
+        def registrar(conn):
+            cliente = conn.execute(
+                'SELECT 1 FROM clientes WHERE id = ? AND usuario_email = ?',
+                (cliente_id, usuario_email)).fetchone()
+            if cliente is None:
+                raise SaleError('Cliente não encontrado ou não pertence a você!', 'not_found')
+
+            produto = conn.execute('''
+                UPDATE produtos SET quantidade = quantidade - ?
+                WHERE id = ? AND usuario_email = ? AND quantidade >= ?
+                RETURNING preco
+            ''', (quantidade, produto_id, usuario_email, quantidade)).fetchall()
+            if not produto:
+                estoque = conn.execute(
+                    'SELECT quantidade FROM produtos WHERE id = ? AND usuario_email = ?',
+                    (produto_id, usuario_email)).fetchone()
+                if estoque is None:
+                    raise SaleError('Produto não encontrado ou não pertence a você!', 'not_found')
+                raise SaleError(f'Estoque insuficiente! Disponível: {estoque[0]}', 'stock')
+
+            preco = produto[0][0]
+            sale = Sale(cliente_id=cliente_id, produto_id=produto_id, quantidade=quantidade,
+                        preco_unitario=preco, total=preco * quantidade,
+                        usuario_email=usuario_email)
+            sale.id = conn.execute('''
+                INSERT INTO vendas (cliente_id, produto_id, quantidade, preco_unitario, total, usuario_email)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (cliente_id, produto_id, quantidade, preco, sale.total,
+                  usuario_email)).lastrowid
+            return sale
+
+        try:
+            # Item isolado por SAVEPOINT no lote da fila: uma recusa desfaz só esta venda
+            sale = get_tenant_write_queue(usuario_email).submit(registrar).result()
+        except SaleError:
+            raise
+        except Exception as e:
+            print(f"Erro ao registrar venda: {e}")
+            return None
+
+        # O estoque aparece no catálogo público
+        notify_catalog_write()
+        Product.invalidate_catalog()
+        return sale
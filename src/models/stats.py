@@ -0,0 +1,46 @@
+from src.database.sharding import (get_tenant_connection, release_tenant_connection,
+                                   iter_tenant_read_connections)
+from src.utils.single_flight import single_flight
+
+
+class Stats:
+    FIELDS = ('total_products', 'total_customers', 'total_sales', 'total_revenue')
+
+    @staticmethod
+    def _connections(usuario_email):
+        """Bancos que guardam os contadores do escopo pedido"""
+        if usuario_email is None:
+            yield from iter_tenant_read_connections()
+            return
+        conn = get_tenant_connection(usuario_email, readonly=True)
+        try:
+            yield conn
+        finally:
+            release_tenant_connection(conn)
+
+    @staticmethod
+    @single_flight('stats.get')
+    def get(usuario_email=None):
+        """Contadores mantidos por triggers (globais ou de um vendedor)
+
+        Lê uma linha da tabela stats por banco; no modo particionado os
+        contadores globais são a soma da linha '*' de cada shard.
+        """
+        escopo = usuario_email or '*'
+        totals = dict.fromkeys(Stats.FIELDS, 0)
+        try:
+            for conn in Stats._connections(usuario_email):
+                if not conn:
+                    return None
+                row = conn.execute('''
+                    SELECT total_products, total_customers, total_sales, total_revenue
+                    FROM stats WHERE escopo = ?
+                ''', (escopo,)).fetchone()
+                if row:
+                    for field in Stats.FIELDS:
+                        totals[field] += row[field]
+            totals['total_revenue'] = round(totals['total_revenue'], 2)
+            return totals
+        except Exception as e:
+            print(f"Erro ao buscar estatísticas: {e}")
+            return None
@@ -1,5 +1,5 @@
 import hashlib
-from src.database.connection import get_db_connection
+from src.database.connection import get_db_connection, release_db_connection
 
 
 class User:
@@ -32,12 +32,12 @@ class User:
             print(f"Erro ao criar usuário: {e}")
             return None
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     @staticmethod
     def authenticate(email, password):
         """Autentica um usuário"""
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             print("DEBUG: Falha ao conectar com o banco de dados")
             return None
@@ -87,12 +87,12 @@ class User:
             traceback.print_exc()
             return None
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     @staticmethod
     def get_by_email(email):
         """Busca usuário por email"""
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return None
 
@@ -119,12 +119,12 @@ class User:
             print(f"Erro ao buscar usuário: {e}")
             return None
         finally:
-            conn.close()
+            release_db_connection(conn)
 
     @staticmethod
     def email_exists(email):
         """Verifica se um email já existe"""
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return False
 
@@ -136,4 +136,4 @@ class User:
             print(f"Erro ao verificar email: {e}")
             return False
         finally:
-            conn.close()
+            release_db_connection(conn)
@@ -0,0 +1,103 @@
+# Cache em memória limitado por bytes, com despejo LRU e expiração por TTL
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Tamanho aproximado de um valor em bytes (JSON serializado)"""
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+class LRUCache:
+    """Cache thread-safe: max_bytes limita o total, ttl a idade das entradas"""
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # chave -> (valor, bytes, expira_em)
+        self._bytes = 0
+        # Muda a cada invalidação: cargas iniciadas antes dela não são guardadas
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0,
+                       'expirations': 0, 'invalidations': 0, 'rejected': 0}
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """(True, valor) se a chave está no cache e não expirou, senão (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._drop(key)
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, entry[0]
+
+    def peek(self, key):
+        """Como get, sem contar acerto nem alterar a ordem LRU"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                return False, None
+            return True, entry[0]
+
+    def put(self, key, value, generation=None):
+        """Guarda o valor, despejando as entradas menos usadas se faltar espaço"""
+        size = estimate_size(value)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                self._stats['rejected'] += 1
+                return
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+
+    def get_or_load(self, key, loader):
+        """Valor em cache ou o resultado de loader() (que é então guardado)"""
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self._generation
+        value = loader()
+        self.put(key, value, generation)
+        return value
+
+    def invalidate(self, match=None):
+        """Remove as chaves para as quais match(chave) é verdadeiro (todas se None)"""
+        with self._lock:
+            self._generation += 1
+            keys = [key for key in self._entries if match is None or match(key)]
+            for key in keys:
+                self._drop(key)
+            self._stats['invalidations'] += len(keys)
+            return len(keys)
+
+    def stats(self):
+        """Contadores de acertos, faltas e despejos, e a ocupação atual"""
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            })
+            return data
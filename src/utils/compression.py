@@ -0,0 +1,58 @@
+# Corpos de resposta JSON serializados uma vez e guardados já comprimidos
+import gzip
+import json
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressão feita uma vez por versão do catálogo: níveis altos compensam
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+# Preferência quando o cliente aceita mais de uma codificação
+PREFERRED_ENCODINGS = ('br', 'gzip')
+# Todas as variantes que um EncodedBody pode enviar
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def preferred_encoding(accept_encodings):
+    """Melhor codificação aceita pelo cliente (Accept-Encoding) entre as disponíveis"""
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+
+class EncodedBody:
+    """JSON serializado com as variantes gzip e brotli"""
+
+    def __init__(self, payload):
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # mtime=0: bytes idênticos em todos os workers (mesmo ETag)
+        variants = {'gzip': gzip.compress(data, GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(data, quality=BROTLI_QUALITY)
+        # Corpos pequenos podem crescer ao comprimir: só guarda o que ganha
+        self.variants = {name: body for name, body in variants.items()
+                         if len(body) < len(data)}
+        self.variants['identity'] = data
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelas variantes (limite do cache)"""
+        return sum(len(body) for body in self.variants.values())
+
+    def response(self, encoding='identity'):
+        """Response com a variante pedida (ou a melhor existente abaixo dela)"""
+        if encoding not in self.variants:
+            encoding = 'gzip' if encoding == 'br' and 'gzip' in self.variants else 'identity'
+        response = Response(self.variants[encoding], mimetype='application/json',
+                            direct_passthrough=True)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,47 @@
+# Formatos das exportações em streaming (NDJSON e CSV)
+# As linhas chegam de um gerador e saem em blocos de ~EXPORT_CHUNK_BYTES:
+# a memória usada não depende do tamanho da exportação.
+import csv
+import io
+import json
+import config
+
+
+def _drain(buffer):
+    """Conteúdo acumulado no buffer, que é esvaziado"""
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def ndjson_stream(columns, rows):
+    """Blocos de texto NDJSON: um objeto JSON por linha"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        buffer.write('\n')
+        if buffer.tell() >= config.EXPORT_CHUNK_BYTES:
+            yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+def csv_stream(columns, rows):
+    """Blocos de texto CSV, com a linha de cabeçalho"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= config.EXPORT_CHUNK_BYTES:
+            yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+# formato -> (gerador, mimetype, extensão)
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_stream, 'application/x-ndjson', 'ndjson'),
+    'csv': (csv_stream, 'text/csv', 'csv'),
+}
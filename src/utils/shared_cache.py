@@ -0,0 +1,207 @@
+# Cache compartilhado entre os workers do gunicorn (arquivo SQLite em WAL)
+# Cada entrada pertence a um namespace e a uma geração; quando a geração muda
+# (ex.: a versão do catálogo), as entradas antigas deixam de ser lidas. Após
+# uma escrita, só um worker recalcula cada chave; os outros aguardam e leem
+# o resultado gravado por ele.
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class SharedCache:
+    """Cache chave/valor em um arquivo SQLite visível a todos os processos"""
+
+    def __init__(self, path, max_bytes, ttl, lock_timeout=5.0, poll=0.02):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.poll = poll
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'waits': 0,
+                       'wait_hits': 0, 'lock_timeouts': 0, 'errors': 0}
+        self._schema_ready = False
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _conn(self):
+        """Conexão da thread atual (reaberta após um fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # isolation_level=None: as transações são abertas explicitamente
+            conn = sqlite3.connect(self.path, timeout=self.lock_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            # Conteúdo descartável: não precisa sobreviver a uma queda de energia
+            conn.execute('PRAGMA synchronous = OFF')
+            if not self._schema_ready:
+                self._create_schema(conn)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                geracao TEXT NOT NULL,
+                valor BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, chave, geracao)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_locks (
+                lock_key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self._schema_ready = True
+
+    def get(self, namespace, key, generation):
+        """(True, valor) se houver entrada válida da geração, senão (False, None)"""
+        row = self._conn().execute('''
+            SELECT valor FROM cache_entries
+            WHERE namespace = ? AND chave = ? AND geracao = ? AND expires_at > ?
+        ''', (namespace, repr(key), str(generation), time.time())).fetchone()
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])
+
+    def put(self, namespace, key, generation, value):
+        """Grava o valor e remove as gerações antigas do namespace"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('''
+                DELETE FROM cache_entries
+                WHERE (namespace = ? AND geracao != ?) OR expires_at <= ?
+            ''', (namespace, str(generation), time.time()))
+            conn.execute('''
+                INSERT OR REPLACE INTO cache_entries
+                    (namespace, chave, geracao, valor, nbytes, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (namespace, repr(key), str(generation), blob, len(blob),
+                  time.time() + self.ttl))
+            # Acima do limite: descarta as entradas que expiram primeiro
+            total = conn.execute('SELECT SUM(nbytes) FROM cache_entries').fetchone()[0]
+            if total > self.max_bytes:
+                conn.execute('''
+                    DELETE FROM cache_entries WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, SUM(nbytes) OVER (ORDER BY expires_at DESC) AS acumulado
+                            FROM cache_entries
+                        ) WHERE acumulado > ?
+                    )
+                ''', (self.max_bytes,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _claim(self, lock_key, owner):
+        """Tenta ser o worker que recalcula a chave (lock com prazo)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache_locks WHERE lock_key = ? AND expires_at <= ?',
+                         (lock_key, time.time()))
+            claimed = conn.execute('''
+                INSERT OR IGNORE INTO cache_locks (lock_key, owner, expires_at)
+                VALUES (?, ?, ?)
+            ''', (lock_key, owner, time.time() + self.lock_timeout)).rowcount == 1
+            conn.execute('COMMIT')
+            return claimed
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _locked(self, lock_key):
+        return self._conn().execute(
+            'SELECT 1 FROM cache_locks WHERE lock_key = ? AND expires_at > ?',
+            (lock_key, time.time())).fetchone() is not None
+
+    def _release(self, lock_key, owner):
+        self._conn().execute('DELETE FROM cache_locks WHERE lock_key = ? AND owner = ?',
+                             (lock_key, owner))
+
+    def _wait_for(self, namespace, key, generation, lock_key):
+        """Aguarda o worker que detém o lock gravar o valor: (achou, valor)"""
+        self._count('waits')
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll)
+            found, value = self.get(namespace, key, generation)
+            if found:
+                self._count('wait_hits')
+                return True, value
+            # Lock liberado sem gravação (falha de quem calculava)
+            if not self._locked(lock_key):
+                return False, None
+        self._count('lock_timeouts')
+        return False, None
+
+    def get_or_load(self, namespace, key, generation, loader):
+        """Valor compartilhado da chave; calcula com loader() uma única vez
+
+        Quem obtém o lock calcula e grava; os demais aguardam até
+        lock_timeout pela gravação e, se ela não vier, calculam sozinhos.
+        Falhas do arquivo de cache nunca impedem a leitura: caem no loader().
+        """
+        lock_key = repr((namespace, key, str(generation)))
+        owner = f'{os.getpid()}:{threading.get_ident()}'
+        try:
+            found, value = self.get(namespace, key, generation)
+            if found:
+                self._count('hits')
+                return value
+            self._count('misses')
+            claimed = self._claim(lock_key, owner)
+            if not claimed:
+                found, value = self._wait_for(namespace, key, generation, lock_key)
+                if found:
+                    return value
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Erro no cache compartilhado: {e}")
+            return loader()
+
+        if not claimed:
+            return loader()
+        try:
+            value = loader()
+            self._count('loads')
+            try:
+                self.put(namespace, key, generation, value)
+            except sqlite3.Error as e:
+                self._count('errors')
+                print(f"Erro no cache compartilhado: {e}")
+            return value
+        finally:
+            try:
+                self._release(lock_key, owner)
+            except sqlite3.Error as e:
+                print(f"Erro no cache compartilhado: {e}")
+
+    def stats(self):
+        """Contadores deste processo e ocupação do arquivo compartilhado"""
+        with self._stats_lock:
+            data = dict(self._stats)
+        try:
+            entries, total = self._conn().execute(
+                'SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM cache_entries').fetchone()
+            data.update({'entries': entries, 'bytes': total})
+        except sqlite3.Error:
+            pass
+        data.update({'path': self.path, 'max_bytes': self.max_bytes, 'ttl': self.ttl})
+        return data
@@ -0,0 +1,94 @@
+# Single-flight: chamadas concorrentes com a mesma chave compartilham uma execução
+# A primeira chamada executa; as que chegam enquanto ela roda aguardam e recebem
+# o mesmo resultado (ou a mesma exceção).
+import functools
+import threading
+
+
+class _Call:
+    """Execução em andamento de uma chave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Agrupa as chamadas concorrentes por (nome, chave), com métricas por nome"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def do(self, name, key, fn):
+        """Executa fn() uma vez para as chamadas simultâneas de (name, key)"""
+        flight_key = (name, key)
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0,
+                'max_waiting': 0})
+            stats['calls'] += 1
+            call = self._calls.get(flight_key)
+            leader = call is None
+            if leader:
+                call = self._calls[flight_key] = _Call()
+                call.waiting = 0
+                stats['executions'] += 1
+            else:
+                call.waiting += 1
+                stats['coalesced'] += 1
+                stats['max_waiting'] = max(stats['max_waiting'], call.waiting)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[flight_key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """Métricas por nome: chamadas, execuções reais e chamadas agrupadas"""
+        with self._lock:
+            by_name = {name: dict(stats) for name, stats in self._stats.items()}
+            in_flight = len(self._calls)
+        for stats in by_name.values():
+            stats['coalesced_ratio'] = (
+                round(stats['coalesced'] / stats['calls'], 4) if stats['calls'] else 0)
+        return {'in_flight': in_flight, 'by_name': by_name}
+
+
+_group = SingleFlight()
+
+
+def single_flight(name, scope=None):
+    """Decorador: agrupa chamadas simultâneas com os mesmos argumentos
+
+    scope() (opcional) entra na chave, ex.: a versão dos dados, para que uma
+    chamada não receba o resultado de uma execução iniciada antes de uma escrita.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())), scope() if scope else None)
+            return _group.do(name, key, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def get_single_flight_stats():
+    """Métricas de agrupamento de chamadas deste processo"""
+    return _group.stats()
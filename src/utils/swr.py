@@ -0,0 +1,115 @@
+# Stale-while-revalidate: serve a última resposta boa enquanto recalcula em segundo plano
+# Cada entrada é fresca por fresh_s (e enquanto a versão dos dados não muda);
+# depois disso continua sendo servida por até max_stale_s, enquanto uma thread
+# recalcula. Só sem entrada utilizável a requisição espera o cálculo.
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class _Entry:
+    def __init__(self, value, version):
+        self.value = value
+        self.version = version
+        self.stored_at = time.time()
+        self.stale_since = None
+
+
+class StaleWhileRevalidate:
+    """Últimas respostas boas por chave, com recálculo em segundo plano"""
+
+    def __init__(self, fresh_s, max_stale_s, max_entries=512, workers=2):
+        self.fresh_s = fresh_s
+        self.max_stale_s = max_stale_s
+        self.max_entries = max_entries
+        self.workers = workers
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._stats = {FRESH: 0, STALE: 0, MISS: 0, 'refreshes': 0,
+                       'refresh_errors': 0, 'too_stale': 0}
+
+    def _submit(self, fn):
+        """Executor de recálculo do processo (recriado após um fork)"""
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='swr')
+            self._executor_pid = os.getpid()
+        self._executor.submit(fn)
+
+    def _store(self, key, value, version):
+        with self._lock:
+            self._entries[key] = _Entry(value, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key, loader, version_fn):
+        """Recalcula a chave fora da requisição; falhas mantêm a entrada antiga"""
+        try:
+            version = version_fn() if version_fn else None
+            value = loader()
+            if value is not None:
+                self._store(key, value, version)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            print(f"Erro ao recalcular {key}: {e}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, loader, version_fn=None):
+        """Retorna (valor, versão do valor, idade em segundos, estado)
+
+        loader() devolve o valor ou None em caso de erro (que não é guardado);
+        version_fn() dá a versão atual dos dados, se houver uma.
+        """
+        version = version_fn() if version_fn else None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            state = MISS
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.version == version and now - entry.stored_at <= self.fresh_s:
+                    state = FRESH
+                else:
+                    if entry.stale_since is None:
+                        entry.stale_since = now
+                    # Janela de max_stale_s desde que a entrada ficou velha,
+                    # sem servir nada mais antigo que fresh_s + max_stale_s
+                    if (now - entry.stale_since <= self.max_stale_s
+                            and now - entry.stored_at <= self.fresh_s + self.max_stale_s):
+                        state = STALE
+                        if key not in self._refreshing:
+                            self._refreshing.add(key)
+                            self._submit(lambda: self._refresh(key, loader, version_fn))
+                    else:
+                        self._stats['too_stale'] += 1
+            self._stats[state] += 1
+
+        if state != MISS:
+            return entry.value, entry.version, int(now - entry.stored_at), state
+        value = loader()
+        if value is not None:
+            self._store(key, value, version)
+        return value, version, 0, MISS
+
+    def stats(self):
+        """Contadores de respostas frescas, velhas e recalculadas"""
+        with self._lock:
+            data = dict(self._stats)
+            data.update({'entries': len(self._entries), 'refreshing': len(self._refreshing),
+                         'fresh_s': self.fresh_s, 'max_stale_s': self.max_stale_s})
+            return data
@@ -3,14 +3,33 @@
 class ProductsManager {
     constructor() {
         this.productsContainer = document.getElementById('products-container');
+        this.products = [];
+        this.nextCursor = null;
+        this.loading = false;
         this.init();
     }
 
     init() {
         this.loadUserInfo();
+        this.setupInfiniteScroll();
         this.loadProducts();
     }
 
+    // Infinite scroll: a sentinel below the list requests the next page
+    setupInfiniteScroll() {
+        this.sentinel = document.createElement('div');
+        this.sentinel.id = 'products-sentinel';
+        this.productsContainer.after(this.sentinel);
+
+        if (!('IntersectionObserver' in window)) return;
+        this.observer = new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting && this.nextCursor && !this.loading) {
+                this.loadProducts(this.nextCursor);
+            }
+        }, { rootMargin: '400px' });
+        this.observer.observe(this.sentinel);
+    }
+
     loadUserInfo() {
         const userData = localStorage.getItem('user');
         if (userData) {
@@ -22,19 +41,37 @@ class ProductsManager {
         }
     }
 
-    async loadProducts() {
+    async loadProducts(cursor = null) {
+        this.loading = true;
         try {
-            const response = await fetch('/api/get_products');
+            const url = cursor
+                ? `/api/get_products?cursor=${encodeURIComponent(cursor)}`
+                : '/api/get_products';
+            const response = await fetch(url);
             const data = await response.json();
 
             if (response.ok && data.success) {
-                this.displayProducts(data.products);
+                this.nextCursor = data.next_cursor;
+                if (cursor) {
+                    this.products = this.products.concat(data.products);
+                    this.appendProducts(data.products);
+                } else {
+                    this.products = data.products;
+                    this.displayProducts(data.products);
+                }
             } else {
                 this.showError('Error loading products');
             }
         } catch (error) {
             console.error('Error:', error);
             this.showError('Error connecting to server');
+        } finally {
+            this.loading = false;
+            // Re-check the sentinel in case the page did not fill the screen
+            if (this.observer) {
+                this.observer.unobserve(this.sentinel);
+                this.observer.observe(this.sentinel);
+            }
         }
     }
 
@@ -57,6 +94,15 @@ class ProductsManager {
         `;
     }
 
+    appendProducts(products) {
+        const grid = this.productsContainer.querySelector('.products-grid');
+        if (!grid) {
+            this.displayProducts(this.products);
+            return;
+        }
+        grid.insertAdjacentHTML('beforeend', products.map(product => this.createProductCard(product)).join(''));
+    }
+
     createProductCard(product) {
         const imageUrl = product.image_path ? `/static/uploads/${product.image_path}` : '/static/img/default-product.png';
         
@@ -102,7 +148,7 @@ class ProductsManager {
             const data = await response.json();
 
             if (response.ok && data.success) {
-                // Reload products
+                // Reload products from the first page
                 this.loadProducts();
             } else {
                 this.showError(data.message || 'Error deleting product');
@@ -4,6 +4,11 @@ from datetime import datetime
 import os
 import csv
 import pandas as pd
+from src.database import profiles
+from src.database.archive import vendas_source
+from src.models.sale import Sale, SaleError
+from src.analytics import reports as analytics
+from src.analytics.parquet_export import export_database
 
 
 def limpar_terminal():
@@ -11,6 +16,30 @@ def limpar_terminal():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 
+def data_valida(texto):
+    """Verifica se o texto está no formato YYYY-MM-DD"""
+    try:
+        datetime.strptime(texto, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def pedir_data_inicial():
+    """Data inicial opcional dos relatórios de vendas (None = todo o histórico)
+
+    Retorna False se a data digitada for inválida.
+    """
+    texto = input(
+        "Vendas desde (YYYY-MM-DD, Enter para todo o histórico): ").strip()
+    if not texto:
+        return None
+    if not data_valida(texto):
+        print("Data inválida! Use o formato YYYY-MM-DD.")
+        return False
+    return texto
+
+
 def garantir_pastas_existem():
     """Garante que as pastas relatorios e inventario existem"""
     pastas = ['relatorios', 'inventario',
@@ -799,44 +828,43 @@ def nova_venda(connect, user_email):
     confirmacao = input("\nConfirmar venda? (s/n): ").strip().lower()
 
     if confirmacao in ['s', 'sim']:
+        # Baixa condicional do estoque + venda em uma transação: o estoque
+        # pode ter mudado desde a consulta acima (outra venda simultânea)
         try:
-            # Registrar a venda
-            connect.execute('''
-                INSERT INTO vendas (cliente_id, produto_id, quantidade, preco_unitario, total, usuario_email)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (cliente_id, produto_id, quantidade, produto[1], total, user_email))
-
-            # Atualizar estoque
-            nova_quantidade = produto[2] - quantidade
-            connect.execute('UPDATE produtos SET quantidade = ? WHERE id = ? AND usuario_email = ?',
-                            (nova_quantidade, produto_id, user_email))
-
-            connect.commit()
+            venda = Sale.create(user_email, cliente_id, produto_id, quantidade)
+        except SaleError as e:
+            print(e)
+            return
+        if venda:
             print("Venda registrada com sucesso!")
-        except Exception as e:
-            print(f"Erro ao registrar venda: {e}")
     else:
         print("Venda cancelada.")
 
 
 def listar_vendas(connect, user_email):
     """Lista todas as vendas do usuário"""
+    desde = pedir_data_inicial()
+    if desde is False:
+        return
+
     print("\n" + "-"*100)
     print(f"LISTA DE VENDAS - {user_email}")
     print("-"*100)
     print(f"{'ID':<5} {'CLIENTE':<25} {'PRODUTO':<25} {'QTD':<5} {'PREÇO UN.':<10} {'TOTAL':<10} {'DATA':<20}")
     print("-"*100)
 
-    cursor = connect.execute('''
-        SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
-        FROM vendas v
-        JOIN clientes c ON v.cliente_id = c.id
-        JOIN produtos p ON v.produto_id = p.id
-        WHERE v.usuario_email = ?
-        ORDER BY v.data_venda DESC
-    ''', (user_email,))
+    # Meses arquivados só entram se o período chegar até eles
+    with vendas_source(connect, desde) as fonte:
+        cursor = connect.execute(f'''
+            SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
+            FROM {fonte} v
+            JOIN clientes c ON v.cliente_id = c.id
+            JOIN produtos p ON v.produto_id = p.id
+            WHERE v.usuario_email = ? AND v.sale_day >= ?
+            ORDER BY v.data_venda DESC
+        ''', (user_email, desde or ''))
 
-    vendas = cursor.fetchall()
+        vendas = cursor.fetchall()
 
     if not vendas:
         print("Nenhuma venda registrada!")
@@ -859,21 +887,26 @@ def gerar_relatorio_vendas_excel(connect, user_email):
     print("-"*50)
 
     try:
+        desde = pedir_data_inicial()
+        if desde is False:
+            return
+
         # Garantir que a pasta relatorios existe
         garantir_pastas_existem()
 
         # Buscar todas as vendas do usuário
-        cursor = connect.execute('''
-            SELECT v.id, c.nome as cliente, p.nome as produto, v.quantidade,
-                   v.preco_unitario, v.total, v.data_venda
-            FROM vendas v
-            JOIN clientes c ON v.cliente_id = c.id
-            JOIN produtos p ON v.produto_id = p.id
-            WHERE v.usuario_email = ?
-            ORDER BY v.data_venda DESC
-        ''', (user_email,))
-
-        vendas = cursor.fetchall()
+        with vendas_source(connect, desde) as fonte:
+            cursor = connect.execute(f'''
+                SELECT v.id, c.nome as cliente, p.nome as produto, v.quantidade,
+                       v.preco_unitario, v.total, v.data_venda
+                FROM {fonte} v
+                JOIN clientes c ON v.cliente_id = c.id
+                JOIN produtos p ON v.produto_id = p.id
+                WHERE v.usuario_email = ? AND v.sale_day >= ?
+                ORDER BY v.data_venda DESC
+            ''', (user_email, desde or ''))
+
+            vendas = cursor.fetchall()
 
         if not vendas:
             print("Nenhuma venda encontrada para gerar relatório!")
@@ -1003,36 +1036,40 @@ def buscar_venda(connect, user_email):
             print("Termo de busca é obrigatório!")
             return
 
-        cursor = connect.execute('''
-            SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
-            FROM vendas v
-            JOIN clientes c ON v.cliente_id = c.id
-            JOIN produtos p ON v.produto_id = p.id
-            WHERE c.nome LIKE ? AND v.usuario_email = ?
-            ORDER BY v.data_venda DESC
-        ''', (f'%{termo}%', user_email))
+        with vendas_source(connect) as fonte:
+            vendas = connect.execute(f'''
+                SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
+                FROM {fonte} v
+                JOIN clientes c ON v.cliente_id = c.id
+                JOIN produtos p ON v.produto_id = p.id
+                WHERE c.nome LIKE ? AND v.usuario_email = ?
+                ORDER BY v.data_venda DESC
+            ''', (f'%{termo}%', user_email)).fetchall()
 
     elif opcao == 2:
         data = input("Digite a data (YYYY-MM-DD): ").strip()
         if not data:
             print("Data é obrigatória!")
             return
+        if not data_valida(data):
+            print("Data inválida! Use o formato YYYY-MM-DD.")
+            return
 
-        cursor = connect.execute('''
-            SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
-            FROM vendas v
-            JOIN clientes c ON v.cliente_id = c.id
-            JOIN produtos p ON v.produto_id = p.id
-            WHERE DATE(v.data_venda) = ? AND v.usuario_email = ?
-            ORDER BY v.data_venda DESC
-        ''', (data, user_email))
+        # sale_day = dia (UTC) de data_venda, indexado por vendedor
+        with vendas_source(connect, data, data) as fonte:
+            vendas = connect.execute(f'''
+                SELECT v.id, c.nome, p.nome, v.quantidade, v.preco_unitario, v.total, v.data_venda
+                FROM {fonte} v
+                JOIN clientes c ON v.cliente_id = c.id
+                JOIN produtos p ON v.produto_id = p.id
+                WHERE v.usuario_email = ? AND v.sale_day = ?
+                ORDER BY v.data_venda DESC
+            ''', (user_email, data)).fetchall()
 
     else:
         print("Opção inválida!")
         return
 
-    vendas = cursor.fetchall()
-
     if not vendas:
         print("Nenhuma venda encontrada!")
         input("\nPressione Enter para voltar ao menu...")
@@ -1059,10 +1096,10 @@ def relatorio_vendas(connect, user_email):
     print(f"RELATÓRIO DE VENDAS - {user_email}")
     print("-"*50)
 
-    # Total de vendas do usuário
+    # Total de vendas do usuário (contadores incluem as vendas arquivadas)
     cursor = connect.execute(
-        'SELECT COUNT(*), SUM(total) FROM vendas WHERE usuario_email = ?', (user_email,))
-    resultado = cursor.fetchone()
+        'SELECT total_sales, total_revenue FROM stats WHERE escopo = ?', (user_email,))
+    resultado = cursor.fetchone() or (0, 0)
     total_vendas = resultado[0] or 0
     valor_total = resultado[1] or 0
 
@@ -1070,18 +1107,18 @@ def relatorio_vendas(connect, user_email):
     print(f"Valor total: R$ {valor_total:.2f}")
 
     # Top 5 produtos mais vendidos do usuário
-    print("\nTop 5 produtos mais vendidos:")
-    cursor = connect.execute('''
-        SELECT p.nome, SUM(v.quantidade) as total_vendido, SUM(v.total) as valor_total
-        FROM vendas v
-        JOIN produtos p ON v.produto_id = p.id
-        WHERE v.usuario_email = ?
-        GROUP BY p.id, p.nome
-        ORDER BY total_vendido DESC
-        LIMIT 5
-    ''', (user_email,))
+    if analytics.available(connect, user_email):
+        # Agregação na base Parquet, sem varrer vendas no SQLite
+        print(f"(Base analítica exportada em {analytics.exported_at(connect)})")
+        df = analytics.sales_frame(user_email)
+        produtos = list(analytics.top_products(df, 5)[
+            ['produto', 'quantidade', 'total']].itertuples(index=False))
+        clientes = list(analytics.top_clients(df, 5)[
+            ['cliente', 'compras', 'total']].itertuples(index=False))
+    else:
+        produtos, clientes = top_vendas_sql(connect, user_email)
 
-    produtos = cursor.fetchall()
+    print("\nTop 5 produtos mais vendidos:")
     if produtos:
         print(f"{'PRODUTO':<25} {'QTD VENDIDA':<15} {'VALOR TOTAL':<15}")
         print("-"*55)
@@ -1090,17 +1127,6 @@ def relatorio_vendas(connect, user_email):
 
     # Top 5 clientes do usuário
     print("\nTop 5 clientes:")
-    cursor = connect.execute('''
-        SELECT c.nome, COUNT(v.id) as total_compras, SUM(v.total) as valor_total
-        FROM vendas v
-        JOIN clientes c ON v.cliente_id = c.id
-        WHERE v.usuario_email = ?
-        GROUP BY c.id, c.nome
-        ORDER BY valor_total DESC
-        LIMIT 5
-    ''', (user_email,))
-
-    clientes = cursor.fetchall()
     if clientes:
         print(f"{'CLIENTE':<25} {'COMPRAS':<10} {'VALOR TOTAL':<15}")
         print("-"*50)
@@ -1111,6 +1137,31 @@ def relatorio_vendas(connect, user_email):
     limpar_terminal()
 
 
+def top_vendas_sql(connect, user_email):
+    """Top 5 produtos e clientes direto do SQLite (sem base analítica)"""
+    with vendas_source(connect) as fonte:
+        produtos = connect.execute(f'''
+            SELECT p.nome, SUM(v.quantidade) as total_vendido, SUM(v.total) as valor_total
+            FROM {fonte} v
+            JOIN produtos p ON v.produto_id = p.id
+            WHERE v.usuario_email = ?
+            GROUP BY p.id, p.nome
+            ORDER BY total_vendido DESC
+            LIMIT 5
+        ''', (user_email,)).fetchall()
+
+        clientes = connect.execute(f'''
+            SELECT c.nome, COUNT(v.id) as total_compras, SUM(v.total) as valor_total
+            FROM {fonte} v
+            JOIN clientes c ON v.cliente_id = c.id
+            WHERE v.usuario_email = ?
+            GROUP BY c.id, c.nome
+            ORDER BY valor_total DESC
+            LIMIT 5
+        ''', (user_email,)).fetchall()
+    return produtos, clientes
+
+
 def menu_analise_vendas(connect, user_email):
     """Menu de análise de vendas"""
     while True:
@@ -1121,7 +1172,8 @@ def menu_analise_vendas(connect, user_email):
         print("2. Vendas por período")
         print("3. Produtos em baixo estoque")
         print("4. Gerar relatório Excel completo")
-        print("5. Voltar ao menu principal")
+        print("5. Atualizar base analítica (Parquet)")
+        print("6. Voltar ao menu principal")
         print("-"*50)
 
         try:
@@ -1136,6 +1188,8 @@ def menu_analise_vendas(connect, user_email):
             elif opcao == 4:
                 gerar_relatorio_analise_vendas_excel(connect, user_email)
             elif opcao == 5:
+                atualizar_base_analitica(connect)
+            elif opcao == 6:
                 break
             else:
                 print("Opção inválida!")
@@ -1146,6 +1200,23 @@ def menu_analise_vendas(connect, user_email):
             print(f"Erro inesperado: {e}")
 
 
+def atualizar_base_analitica(connect):
+    """Exporta as vendas novas e o retrato de produtos/clientes para Parquet"""
+    print("\n" + "-"*50)
+    print("ATUALIZAR BASE ANALÍTICA")
+    print("-"*50)
+
+    try:
+        vendas = export_database(connect)
+        print(f"✅ Base analítica atualizada! {vendas} novas vendas exportadas.")
+    except ImportError as e:
+        print(f"❌ Erro: {e}")
+    except Exception as e:
+        print(f"❌ Erro ao exportar base analítica: {e}")
+    input("\nPressione Enter para voltar ao menu...")
+    limpar_terminal()
+
+
 def vendas_por_periodo(connect, user_email):
     """Analisa vendas por período"""
     print("\n" + "-"*50)
@@ -1159,14 +1230,28 @@ def vendas_por_periodo(connect, user_email):
         if not data_inicio or not data_fim:
             print("Datas são obrigatórias!")
             return
+        if not data_valida(data_inicio) or not data_valida(data_fim):
+            print("Data inválida! Use o formato YYYY-MM-DD.")
+            return
 
-        cursor = connect.execute('''
-            SELECT COUNT(*), SUM(total)
-            FROM vendas
-            WHERE DATE(data_venda) BETWEEN ? AND ? AND usuario_email = ?
-        ''', (data_inicio, data_fim, user_email))
+        # Faixa em idx_vendas_usuario_dia (usuario_email, sale_day, total),
+        # anexando apenas os meses arquivados dentro do período
+        with vendas_source(connect, data_inicio, data_fim) as fonte:
+            resultado = connect.execute(f'''
+                SELECT COUNT(*), SUM(total)
+                FROM {fonte}
+                WHERE usuario_email = ? AND sale_day BETWEEN ? AND ?
+            ''', (user_email, data_inicio, data_fim)).fetchone()
+
+            # Vendas por dia no período
+            vendas_diarias = connect.execute(f'''
+                SELECT sale_day as data, COUNT(*), SUM(total)
+                FROM {fonte}
+                WHERE usuario_email = ? AND sale_day BETWEEN ? AND ?
+                GROUP BY sale_day
+                ORDER BY sale_day
+            ''', (user_email, data_inicio, data_fim)).fetchall()
 
-        resultado = cursor.fetchone()
         total_vendas = resultado[0] or 0
         valor_total = resultado[1] or 0
 
@@ -1174,16 +1259,6 @@ def vendas_por_periodo(connect, user_email):
         print(f"Total de vendas: {total_vendas}")
         print(f"Valor total: R$ {valor_total:.2f}")
 
-        # Vendas por dia no período
-        cursor = connect.execute('''
-            SELECT DATE(data_venda) as data, COUNT(*), SUM(total)
-            FROM vendas
-            WHERE DATE(data_venda) BETWEEN ? AND ? AND usuario_email = ?
-            GROUP BY DATE(data_venda)
-            ORDER BY data
-        ''', (data_inicio, data_fim, user_email))
-
-        vendas_diarias = cursor.fetchall()
         if vendas_diarias:
             print(f"\nVendas por dia:")
             print(f"{'DATA':<15} {'VENDAS':<10} {'VALOR':<15}")
@@ -1246,23 +1321,33 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
     print("-"*50)
 
     try:
+        desde = pedir_data_inicial()
+        if desde is False:
+            return
+
         # Garantir que a pasta relatorios existe
         garantir_pastas_existem()
 
-        # Buscar dados para análise
-        cursor = connect.execute('''
-            SELECT v.id, c.nome as cliente, p.nome as produto, v.quantidade,
-                   v.preco_unitario, v.total, v.data_venda
-            FROM vendas v
-            JOIN clientes c ON v.cliente_id = c.id
-            JOIN produtos p ON v.produto_id = p.id
-            WHERE v.usuario_email = ?
-            ORDER BY v.data_venda DESC
-        ''', (user_email,))
-
-        vendas = cursor.fetchall()
-
-        if not vendas:
+        # Buscar dados para análise: base Parquet quando exportada, senão SQLite
+        if analytics.available(connect, user_email):
+            print(f"Fonte: base analítica exportada em {analytics.exported_at(connect)}")
+            df = analytics.sales_frame(user_email, desde)
+        else:
+            with vendas_source(connect, desde) as fonte:
+                cursor = connect.execute(f'''
+                    SELECT v.id, c.nome as cliente, p.nome as produto, v.quantidade,
+                           v.preco_unitario, v.total, v.data_venda,
+                           v.cliente_id, v.produto_id
+                    FROM {fonte} v
+                    JOIN clientes c ON v.cliente_id = c.id
+                    JOIN produtos p ON v.produto_id = p.id
+                    WHERE v.usuario_email = ? AND v.sale_day >= ?
+                    ORDER BY v.data_venda DESC
+                ''', (user_email, desde or ''))
+                df = pd.DataFrame(cursor.fetchall(),
+                                  columns=analytics.SALES_COLUMNS)
+
+        if df.empty:
             print("Nenhuma venda encontrada para gerar relatório!")
             input("\nPressione Enter para voltar ao menu...")
             limpar_terminal()
@@ -1276,8 +1361,9 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
         with pd.ExcelWriter(filename, engine='openpyxl') as writer:
 
             # 1. Planilha de Vendas Detalhadas
-            df_vendas = pd.DataFrame(vendas, columns=[
-                                     'ID', 'Cliente', 'Produto', 'Quantidade', 'Preço Unitário', 'Total', 'Data Venda'])
+            df_vendas = df.drop(columns=['cliente_id', 'produto_id'])
+            df_vendas.columns = ['ID', 'Cliente', 'Produto', 'Quantidade',
+                                 'Preço Unitário', 'Total', 'Data Venda']
             df_vendas['Preço Unitário'] = df_vendas['Preço Unitário'].apply(
                 lambda x: f"R$ {x:.2f}")
             df_vendas['Total'] = df_vendas['Total'].apply(
@@ -1288,9 +1374,9 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
                 writer, sheet_name='Vendas Detalhadas', index=False)
 
             # 2. Planilha de Resumo Geral
-            total_vendas = len(vendas)
-            valor_total = sum(venda[5] for venda in vendas)
-            ticket_medio = valor_total / total_vendas if total_vendas > 0 else 0
+            resumo = analytics.summary(df)
+            total_vendas = resumo['vendas']
+            valor_total = resumo['valor_total']
 
             resumo_data = {
                 'Métrica': [
@@ -1305,13 +1391,11 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
                 'Valor': [
                     total_vendas,
                     f"R$ {valor_total:.2f}",
-                    f"R$ {ticket_medio:.2f}",
-                    min(venda[6][:10]
-                        for venda in vendas if venda[6]) if vendas else "N/A",
-                    max(venda[6][:10]
-                        for venda in vendas if venda[6]) if vendas else "N/A",
-                    len(set(venda[1] for venda in vendas)),
-                    len(set(venda[2] for venda in vendas))
+                    f"R$ {resumo['ticket_medio']:.2f}",
+                    resumo['primeira_venda'],
+                    resumo['ultima_venda'],
+                    resumo['clientes_unicos'],
+                    resumo['produtos_unicos']
                 ]
             }
 
@@ -1319,92 +1403,43 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
             df_resumo.to_excel(writer, sheet_name='Resumo Geral', index=False)
 
             # 3. Planilha de Produtos Mais Vendidos
-            produtos_vendidos = {}
-            for venda in vendas:
-                produto = venda[2]
-                quantidade = venda[3]
-                total = venda[5]
-
-                if produto in produtos_vendidos:
-                    produtos_vendidos[produto]['quantidade'] += quantidade
-                    produtos_vendidos[produto]['total'] += total
-                    produtos_vendidos[produto]['vendas'] += 1
-                else:
-                    produtos_vendidos[produto] = {
-                        'quantidade': quantidade, 'total': total, 'vendas': 1}
-
-            if produtos_vendidos:
-                produtos_data = []
-                for produto, dados in sorted(produtos_vendidos.items(), key=lambda x: x[1]['quantidade'], reverse=True):
-                    produtos_data.append([
-                        produto,
-                        dados['quantidade'],
-                        dados['vendas'],
-                        f"R$ {dados['total']:.2f}",
-                        f"R$ {dados['total']/dados['quantidade']:.2f}"
-                    ])
-
-                df_produtos = pd.DataFrame(produtos_data, columns=[
-                                           'Produto', 'Quantidade Vendida', 'Número de Vendas', 'Valor Total', 'Preço Médio'])
+            produtos = analytics.top_products(df)
+            if not produtos.empty:
+                df_produtos = pd.DataFrame({
+                    'Produto': produtos['produto'],
+                    'Quantidade Vendida': produtos['quantidade'],
+                    'Número de Vendas': produtos['vendas'],
+                    'Valor Total': produtos['total'].map(lambda x: f"R$ {x:.2f}"),
+                    'Preço Médio': (produtos['total'] / produtos['quantidade']).map(
+                        lambda x: f"R$ {x:.2f}")
+                })
                 df_produtos.to_excel(
                     writer, sheet_name='Produtos Mais Vendidos', index=False)
 
             # 4. Planilha de Clientes Mais Valiosos
-            clientes_vendidos = {}
-            for venda in vendas:
-                cliente = venda[1]
-                quantidade = venda[3]
-                total = venda[5]
-
-                if cliente in clientes_vendidos:
-                    clientes_vendidos[cliente]['quantidade'] += quantidade
-                    clientes_vendidos[cliente]['total'] += total
-                    clientes_vendidos[cliente]['compras'] += 1
-                else:
-                    clientes_vendidos[cliente] = {
-                        'quantidade': quantidade, 'total': total, 'compras': 1}
-
-            if clientes_vendidos:
-                clientes_data = []
-                for cliente, dados in sorted(clientes_vendidos.items(), key=lambda x: x[1]['total'], reverse=True):
-                    clientes_data.append([
-                        cliente,
-                        dados['compras'],
-                        dados['quantidade'],
-                        f"R$ {dados['total']:.2f}",
-                        f"R$ {dados['total']/dados['compras']:.2f}"
-                    ])
-
-                df_clientes = pd.DataFrame(clientes_data, columns=[
-                                           'Cliente', 'Número de Compras', 'Quantidade Total', 'Valor Total', 'Ticket Médio'])
+            clientes = analytics.top_clients(df)
+            if not clientes.empty:
+                df_clientes = pd.DataFrame({
+                    'Cliente': clientes['cliente'],
+                    'Número de Compras': clientes['compras'],
+                    'Quantidade Total': clientes['quantidade'],
+                    'Valor Total': clientes['total'].map(lambda x: f"R$ {x:.2f}"),
+                    'Ticket Médio': (clientes['total'] / clientes['compras']).map(
+                        lambda x: f"R$ {x:.2f}")
+                })
                 df_clientes.to_excel(
                     writer, sheet_name='Clientes Mais Valiosos', index=False)
 
-            # 5. Planilha de Vendas por Período (últimos 12 meses)
-            vendas_por_mes = {}
-            for venda in vendas:
-                if venda[6]:
-                    mes_ano = venda[6][:7]  # YYYY-MM
-                    total = venda[5]
-
-                    if mes_ano in vendas_por_mes:
-                        vendas_por_mes[mes_ano]['total'] += total
-                        vendas_por_mes[mes_ano]['vendas'] += 1
-                    else:
-                        vendas_por_mes[mes_ano] = {'total': total, 'vendas': 1}
-
-            if vendas_por_mes:
-                periodos_data = []
-                for mes_ano, dados in sorted(vendas_por_mes.items()):
-                    periodos_data.append([
-                        mes_ano,
-                        dados['vendas'],
-                        f"R$ {dados['total']:.2f}",
-                        f"R$ {dados['total']/dados['vendas']:.2f}"
-                    ])
-
-                df_periodos = pd.DataFrame(periodos_data, columns=[
-                                           'Mês/Ano', 'Número de Vendas', 'Valor Total', 'Ticket Médio'])
+            # 5. Planilha de Vendas por Período
+            periodos = analytics.monthly_totals(df)
+            if not periodos.empty:
+                df_periodos = pd.DataFrame({
+                    'Mês/Ano': periodos['mes'],
+                    'Número de Vendas': periodos['vendas'],
+                    'Valor Total': periodos['total'].map(lambda x: f"R$ {x:.2f}"),
+                    'Ticket Médio': (periodos['total'] / periodos['vendas']).map(
+                        lambda x: f"R$ {x:.2f}")
+                })
                 df_periodos.to_excel(
                     writer, sheet_name='Vendas por Período', index=False)
 
@@ -1427,10 +1462,10 @@ def gerar_relatorio_analise_vendas_excel(connect, user_email):
 
         print(f"\n✅ Relatório de análise gerado com sucesso!")
         print(f"📁 Arquivo: {filename}")
-        print(f"📊 Total de vendas analisadas: {len(vendas)}")
+        print(f"📊 Total de vendas analisadas: {total_vendas}")
         print(f"💰 Valor total: R$ {valor_total:.2f}")
-        print(f"👥 Clientes únicos: {len(set(venda[1] for venda in vendas))}")
-        print(f"📦 Produtos vendidos: {len(set(venda[2] for venda in vendas))}")
+        print(f"👥 Clientes únicos: {resumo['clientes_unicos']}")
+        print(f"📦 Produtos vendidos: {resumo['produtos_unicos']}")
 
         input("\nPressione Enter para voltar ao menu...")
         limpar_terminal()
@@ -1608,46 +1643,56 @@ def importar_produtos_upload_base(connect, user_email):
 
         print(f"\n🔄 Processando {len(df)} produtos...")
 
-        for index, row in df.iterrows():
-            try:
-                # Extrair dados
-                nome = str(row['Nome']).strip()
-                preco = float(row['Preço'])
-                quantidade = int(row['Quantidade'])
-                categoria = str(row.get('Categoria', '')).strip()
-
-                # Validações
-                if not nome:
-                    erros.append(f"Linha {index + 2}: Nome é obrigatório")
-                    produtos_erro += 1
-                    continue
-
-                if preco < 0:
-                    erros.append(
-                        f"Linha {index + 2}: Preço não pode ser negativo")
-                    produtos_erro += 1
-                    continue
-
-                if quantidade < 0:
-                    erros.append(
-                        f"Linha {index + 2}: Quantidade não pode ser negativa")
+        try:
+            # Perfil de carga em massa durante a importação
+            profiles.apply_profile(connect, 'bulk_load')
+
+            for index, row in df.iterrows():
+                try:
+                    # Extrair dados
+                    nome = str(row['Nome']).strip()
+                    preco = float(row['Preço'])
+                    quantidade = int(row['Quantidade'])
+                    categoria = str(row.get('Categoria', '')).strip()
+
+                    # Validações
+                    if not nome:
+                        erros.append(f"Linha {index + 2}: Nome é obrigatório")
+                        produtos_erro += 1
+                        continue
+
+                    if preco < 0:
+                        erros.append(
+                            f"Linha {index + 2}: Preço não pode ser negativo")
+                        produtos_erro += 1
+                        continue
+
+                    if quantidade < 0:
+                        erros.append(
+                            f"Linha {index + 2}: Quantidade não pode ser negativa")
+                        produtos_erro += 1
+                        continue
+
+                    # Inserir produto no banco
+                    connect.execute('''
+                        INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (nome, preco, quantidade, categoria, user_email))
+
+                    produtos_importados += 1
+
+                except Exception as e:
+                    erros.append(f"Linha {index + 2}: {str(e)}")
                     produtos_erro += 1
-                    continue
-
-                # Inserir produto no banco
-                connect.execute('''
-                    INSERT INTO produtos (nome, preco, quantidade, categoria, usuario_email)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (nome, preco, quantidade, categoria, user_email))
-
-                produtos_importados += 1
-
-            except Exception as e:
-                erros.append(f"Linha {index + 2}: {str(e)}")
-                produtos_erro += 1
 
-        # Commit das alterações
-        connect.commit()
+            # Commit das alterações
+            connect.commit()
+        except Exception:
+            connect.rollback()
+            raise
+        finally:
+            # Volta ao perfil do CLI mesmo se a importação falhar
+            profiles.apply_profile(connect, config.DB_CLI_PROFILE)
 
         # Excluir arquivo após importação
         try:
@@ -1692,7 +1737,10 @@ def user_panel(connect, user_name, user_email):
     print(f"BEM-VINDO AO SEU PAINEL DE GERENCIAMENTO")
     print(f"Usuário: {user_name}")
     print(f"Email: {user_email}")
-    print(f"Banco de dados: database.db (centralizado)")
+    if config.SHARDING_ENABLED:
+        print(f"Banco de dados: shard do vendedor")
+    else:
+        print(f"Banco de dados: database.db (centralizado)")
     print(f"{'='*60}")
 
     option = 0